@@ -1,4 +1,5 @@
 # assignments/ps2.py
+import random
 
 # TASKS je zoznam dvojíc: (názov_tasku, testovací_súbor)
 # Prvý string je meno tasku, druhý je relatívna cesta k testovaciemu .c súboru alebo test skriptu.
@@ -16,5 +17,100 @@ TASKS = [
     #("counter", "ps2/main_test_counter.c"),
 ]
 
+# Súbory zo študentského repozitára, ktoré sa hodnotia (len tieto sa sťahujú pri FETCH_MODE=sparse/api).
+# Prvý súbor je C zdroják so študentskými funkciami.
+SUBMISSION_FILES = ["ps2/arrays.c"]
+
+# Voliteľné testovacie vektory: pri TEST_VECTORS=ps2 sa task, ktorý je tu, netestuje ručne písaným
+# main_test_*.c, ale vygenerovaným harnessom, ktorý v jednom procese prejde všetky prípady a dá
+# pomerné body (viď test_helpers.generate_vector_harness). Bez toho platia ručne písané harnessy.
+_rng = random.Random(2)
+
+def _random_array():
+    # aspoň 2 rôzne prvky, aby array_min vracajúce maximum (a naopak) neprešlo
+    return _rng.sample(range(-1000, 1001), _rng.randint(2, 20))
+
+_arrays = [[1, 5, 3, 2, 4]] + [_random_array() for _ in range(199)]
+_prices = [(4.00, 2, 100)] + [(round(_rng.uniform(0.5, 20), 2), _rng.randint(1, 12), _rng.randint(50, 300))
+                              for _ in range(199)]
+
+TEST_VECTORS = {
+    "unit_price": {
+        "returns": "float",
+        "params": ["float", "int", "int"],
+        "tolerance": 0.01,
+        "cases": [((price, rolls, pieces), price / (rolls * pieces) * 100) for price, rolls, pieces in _prices],
+    },
+    "array_max": {
+        "returns": "int",
+        "params": ["int[]", "int"],
+        "cases": [((array, len(array)), max(array)) for array in _arrays],
+    },
+    "array_min": {
+        "returns": "int",
+        "params": ["int[]", "int"],
+        "cases": [((array, len(array)), min(array)) for array in _arrays],
+    },
+}
+
+# Voliteľné benchmarky: task, ktorý je tu (a zároveň v TASKS), dostane navyše stĺpec <task>_perf.
+# Študentská funkcia sa opakovane volá na veľkých vstupoch a jej medián času sa porovná
+# s referenčným riešením zmeraným v tom istom behu (viď test_helpers.generate_benchmark_harness).
+_bench_rng = random.Random(24)
+_bench_arrays = [[_bench_rng.randint(1, 1000) for _ in range(2000)] for _ in range(20)]
+
+BENCHMARKS = {
+    "collatz": {
+        "returns": "int",
+        "params": ["int"],
+        "reference": r"""
+int collatz(const int number) {
+    long long n = number;
+    int count = 1;
+    while (n != 1) {
+        n = (n & 1) ? 3 * n + 1 : n >> 1;
+        count++;
+    }
+    return count;
+}
+""",
+        # do 100000, aby medzivýsledky nepretiekli ani v int
+        "inputs": [(_bench_rng.randint(1, 100000),) for _ in range(500)],
+    },
+    "special_numbers": {
+        "returns": "int",
+        "params": ["int[]", "int", "out int[]"],
+        # prvky väčšie ako súčet všetkých prvkov za nimi (posledný sa nepočíta), v lineárnom čase
+        "reference": r"""
+int special_numbers(const int input_array[], const int array_size, int result_array[]) {
+    long long total = 0;
+    for (int i = 0; i < array_size; i++) total += input_array[i];
+    int count = 0;
+    long long prefix = 0;
+    for (int i = 0; i < array_size - 1; i++) {
+        prefix += input_array[i];
+        if (input_array[i] > total - prefix) result_array[count++] = input_array[i];
+    }
+    return count;
+}
+""",
+        "inputs": [(array, len(array), None) for array in _bench_arrays],
+    },
+    "counter": {
+        "returns": "void",
+        "params": ["int[]", "int", "out int[]"],
+        # súčet prvkov na párnych a na nepárnych indexoch
+        "reference": r"""
+void counter(const int input_array[], const int arrays_size, int result_array[2]) {
+    result_array[0] = 0;
+    result_array[1] = 0;
+    for (int i = 0; i < arrays_size; i++) result_array[i % 2] += input_array[i];
+}
+""",
+        "inputs": [(array, len(array), None) for array in _bench_arrays],
+        "out_capacity": 2,
+    },
+}
+
 # Ak budeš pre assignment potrebovať aj ďalšie dáta (napr. config premenné, limity, špeciálne nastavenia, pomocné funkcie),
 # môžeš ich tu kľudne definovať, v hlavnom test.py si ich môžeš načítať importom.
@@ -0,0 +1,413 @@
+"""Offline end-to-end benchmark test.py proti lokálnej náhrade GitLabu.
+
+    python bench/bench_e2e.py --repos 60 --env WORKERS=8 --env SINGLE_DRIVER=1
+    python bench/bench_e2e.py --repos 60 --containers 3 --queue sqlite
+
+Vygeneruje N syntetických študentských repozitárov (lokálne bare repo),
+spustí malý HTTP server, ktorý napodobňuje /groups/{id}/projects so
+stránkovaním (voliteľne s umelými 429), a pustí proti nemu test.py.
+Vypíše repos/min, latencie fáz z metrics_*.jsonl a peak RSS gradera.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+from metrics import percentile  # noqa: E402
+
+GROUP_ID = "1"
+FUNCTIONS_OK = """
+float unit_price(const float pack_price, const int rolls_count, const int pieces_count) {
+    return pack_price / (rolls_count * pieces_count) * 100;
+}
+int array_max(const int input_array[], const int arrays_size) {
+    int max = input_array[0];
+    for (int i = 1; i < arrays_size; i++) {
+        if (input_array[i] > max) { max = input_array[i]; }
+    }
+    return max;
+}
+int array_min(const int input_array[], const int arrays_size) {
+    int min = input_array[0];
+    for (int i = 1; i < arrays_size; i++) {
+        if (input_array[i] < min) { min = input_array[i]; }
+    }
+    return min;
+}
+"""
+MAIN = """
+int main(void) {
+    int arr[] = {3, 1, 2};
+    printf("max {%d}\\n", array_max(arr, 3));
+    return 0;
+}
+"""
+VARIANTS = {
+    "correct": "#include <stdio.h>\n" + FUNCTIONS_OK + MAIN,
+    "wrong": "#include <stdio.h>\n" + FUNCTIONS_OK.replace("> max", "< max").replace("< min", "> min")
+             .replace("* 100", "* 10") + MAIN,
+    "no_compile": "#include <stdio.h>\n" + FUNCTIONS_OK.replace("return max;", "return max") + MAIN,
+    "infinite_loop": "#include <stdio.h>\n" + FUNCTIONS_OK.replace("int max = input_array[0];", "int max = input_array[0]; for (;;) {}")
+                     .replace("int min = input_array[0];", "int min = input_array[0]; while (1) {}") + MAIN,
+    "crash": "#include <stdio.h>\n" + FUNCTIONS_OK.replace("int max = input_array[0];",
+                                                           "int max = ((volatile int *)0)[0];") + MAIN,
+    "output_flood": "#include <stdio.h>\n" + FUNCTIONS_OK.replace(
+        "return pack_price", "for (;;) { printf(\"spam spam spam\\n\"); }\n    return pack_price") + MAIN,
+    "missing": None,
+}
+
+
+def git(*args, cwd=None):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def generate_repos(root, count):
+    """Vráti zoznam (index, variant, bare_repo_path)."""
+    repos = []
+    names = list(VARIANTS)
+    for i in range(1, count + 1):
+        variant = names[(i - 1) % len(names)]
+        bare = os.path.join(root, "repos", f"student{i:04d}.git")
+        if os.path.isdir(bare):
+            # --workdir z minulého behu, repozitáre sa nemenia (kvôli INCREMENTAL / RESULT_CACHE)
+            repos.append((i, variant, bare))
+            continue
+        work = os.path.join(root, "work", f"student{i:04d}")
+        os.makedirs(os.path.join(work, "ps2"))
+        if VARIANTS[variant] is None:
+            with open(os.path.join(work, "README.md"), "w") as f:
+                f.write("nothing here\n")
+        else:
+            # každý repozitár je iný, aby ho result cache nezlúčila
+            with open(os.path.join(work, "ps2", "arrays.c"), "w") as f:
+                f.write(f"// student {i}\n" + VARIANTS[variant])
+        with open(os.path.join(work, "notes.bin"), "wb") as f:
+            f.write(os.urandom(64 * 1024))
+        git("init", "-q", "-b", "master", cwd=work)
+        git("add", "-A", cwd=work)
+        git("-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-qm", "submission", cwd=work)
+        git("clone", "-q", "--bare", work, bare)
+        git("config", "uploadpack.allowFilter", "true", cwd=bare)
+        repos.append((i, variant, bare))
+    return repos
+
+
+def group_tree(repos, subgroups):
+    """(projekty podľa id skupiny, podskupiny podľa id skupiny) pre koreňovú skupinu GROUP_ID.
+
+    subgroups=K: K podskupín 2. úrovne a pod každou jedna 3. úrovne; projekty
+    sa rozdelia striedavo, prvý projekt je navyše zdieľaný aj v koreňovej skupine.
+    """
+    projects = [{
+        "id": i,
+        "path": f"student{i:04d}",
+        "name": f"Student {i} ({variant})",
+        "path_with_namespace": f"bench/student{i:04d}",
+        "http_url_to_repo": "file://" + bare,
+        "default_branch": "master",
+        "last_activity_at": "2024-01-01T00:00:00Z",
+    } for i, variant, bare in repos]
+    if not subgroups:
+        return {None: projects}, {}
+    children = {GROUP_ID: [{"id": 100 + k, "full_path": f"bench/g{k}"} for k in range(subgroups)]}
+    for k in range(subgroups):
+        children[str(100 + k)] = [{"id": 200 + k, "full_path": f"bench/g{k}/sub"}]
+    by_group = {GROUP_ID: projects[:1]}
+    for n, project in enumerate(projects):
+        group_id = (100 if n % 2 == 0 else 200) + n // 2 % subgroups
+        project["path_with_namespace"] = f"group{group_id}/{project['path']}"
+        by_group.setdefault(str(group_id), []).append(project)
+    return by_group, children
+
+
+def make_handler(repos, port, per_page_limit, throttle_every, subgroups=0):
+    projects_by_group, subgroups_by_group = group_tree(repos, subgroups)
+    bare_by_id = {str(i): bare for i, _, bare in repos}
+    state = {"requests": 0, "throttled": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, body, headers=()):
+            data = json.dumps(body).encode("utf-8")
+            etag = 'W/"%s"' % hashlib.sha1(data).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def send_page(self, url, query, items):
+            # obmedzenie per_page, aby sa stránkovanie prejavilo aj pri malom počte repozitárov
+            per_page = min(per_page_limit, int(query.get("per_page", ["20"])[0]))
+            page = int(query.get("page", ["1"])[0])
+            total_pages = max(1, math.ceil(len(items) / per_page))
+            headers = [("X-Total", str(len(items))), ("X-Total-Pages", str(total_pages)),
+                       ("X-Page", str(page)), ("X-Per-Page", str(per_page))]
+            if page < total_pages:
+                next_query = dict((k, v[0]) for k, v in query.items())
+                next_query.update(page=str(page + 1), per_page=str(per_page))
+                next_url = (f"http://127.0.0.1:{port}{url.path}?"
+                            + "&".join(f"{k}={quote(v)}" for k, v in next_query.items()))
+                headers.append(("Link", f'<{next_url}>; rel="next"'))
+            self.send_json(items[(page - 1) * per_page:page * per_page], headers)
+
+        def do_GET(self):
+            with lock:
+                state["requests"] += 1
+                throttle = throttle_every and state["requests"] % throttle_every == 0
+                if throttle:
+                    state["throttled"] += 1
+            if throttle:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = url.path.split("/")
+            # /api/v4/groups/<id>/projects, /api/v4/groups/<id>/subgroups
+            if len(parts) == 6 and parts[3] == "groups" and parts[5] in ("projects", "subgroups"):
+                if parts[5] == "subgroups":
+                    items = subgroups_by_group.get(parts[4], [])
+                else:
+                    # bez --subgroups má každá skupina všetky projekty (batch mód s viacerými skupinami)
+                    items = projects_by_group.get(None, projects_by_group.get(parts[4], []))
+                return self.send_page(url, query, items)
+            # /api/v4/projects/<id>/repository/tree
+            if len(parts) == 7 and parts[3] == "projects" and parts[6] == "tree":
+                bare = bare_by_id.get(parts[4])
+                path = query.get("path", [""])[0]
+                proc = subprocess.run(["git", "--git-dir", bare, "ls-tree", "HEAD", path.rstrip("/") + "/"],
+                                      capture_output=True, text=True)
+                items = [{"path": line.split("\t", 1)[1], "type": line.split()[1]}
+                         for line in proc.stdout.splitlines()]
+                return self.send_json(items, [("X-Total-Pages", "1")])
+            # /api/v4/projects/<id>/repository/files/<path>/raw
+            if len(parts) == 9 and parts[3] == "projects" and parts[8] == "raw":
+                bare = bare_by_id.get(parts[4])
+                proc = subprocess.run(["git", "--git-dir", bare, "show", "HEAD:" + unquote(parts[7])],
+                                      capture_output=True)
+                if proc.returncode != 0:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                sha = subprocess.run(["git", "--git-dir", bare, "rev-parse", "HEAD"],
+                                     capture_output=True, text=True).stdout.strip()
+                self.send_response(200)
+                self.send_header("X-Gitlab-Commit-Id", sha)
+                self.send_header("Content-Length", str(len(proc.stdout)))
+                self.end_headers()
+                self.wfile.write(proc.stdout)
+                return
+            self.send_response(404)
+            self.end_headers()
+
+    return Handler, state
+
+
+def clear_results(workdir):
+    """Zmaže výstupy minulého behu v --workdir (CSV, logy, metriky, manifesty), aby ich report nezlúčil.
+
+    Stav INCREMENTAL (state_*) a checkpointy (checkpoint_*) ostanú, tie má ďalší beh použiť.
+    """
+    results_dir = os.path.join(workdir, "results")
+    if not os.path.isdir(results_dir):
+        return
+    for entry in os.listdir(results_dir):
+        if not entry.startswith(("state_", "checkpoint_")):
+            path = os.path.join(results_dir, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+
+def run_grader(workdir, port, extra_env, timeout):
+    results_dir = os.path.join(workdir, "results")
+    os.makedirs(results_dir, exist_ok=True)
+    env = dict(os.environ)
+    env.update({
+        "GITLAB_API_URL": f"http://127.0.0.1:{port}/api/v4",
+        "GITLAB_GROUP_ID": GROUP_ID,
+        "ASSIGNMENT": "ps2",
+        "CONTAINER_ID": "bench",
+        "RESULTS_DIR": results_dir,
+        "STUDENTS_DIR": os.path.join(workdir, "students"),
+        "GITLAB_CACHE_DIR": os.path.join(workdir, "cache", "gitlab"),
+        "HARNESS_CACHE_DIR": os.path.join(workdir, "cache", "harness"),
+        "RESULT_CACHE_DIR": os.path.join(workdir, "cache", "results"),
+        "STUDENT_OBJECT_CACHE_DIR": os.path.join(workdir, "cache", "students"),
+        "MIRROR_DIR": os.path.join(workdir, "cache", "mirrors"),
+    })
+    env.update(extra_env)
+    start = time.perf_counter()
+    # test.py hľadá harnessy relatívne k cwd, preto beží z koreňa repozitára
+    proc = subprocess.Popen([sys.executable, "test.py"], cwd=REPO_ROOT, env=env)
+    deadline = time.monotonic() + timeout
+    while True:
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() > deadline:
+            proc.kill()
+            pid, status, rusage = os.wait4(proc.pid, 0)
+            break
+        time.sleep(0.05)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return time.perf_counter() - start, proc.returncode, rusage, results_dir
+
+
+def run_containers(workdir, port, extra_env, args):
+    """Pustí args.containers graderov naraz a ich CSV spojí do result_bench.csv."""
+    runs = [None] * args.containers
+    # nový beh fronty pri každom spustení, --env WORK_QUEUE_RUN=... ho môže zopakovať
+    run_id = extra_env.get("WORK_QUEUE_RUN") or f"bench-{time.time_ns()}"
+
+    def run(i):
+        env = dict(extra_env, CONTAINER_ID=f"bench{i + 1}", WORK_QUEUE_RUN=run_id)
+        if args.queue == "sqlite":
+            env["WORK_QUEUE"] = os.path.join(workdir, "queue.sqlite")
+        elif args.queue == "dir":
+            env["WORK_QUEUE"] = os.path.join(workdir, "queue")
+        else:
+            env["SHARD"] = f"{i + 1}/{args.containers}"
+        runs[i] = run_grader(workdir, port, env, args.timeout)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(args.containers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results_dir = runs[0][3]
+    for i, (wall, returncode, _, _) in enumerate(runs):
+        with open(os.path.join(results_dir, f"result_bench{i + 1}.csv"), encoding="utf-8") as f:
+            print(f"container bench{i + 1}: exit {returncode}, {wall:.2f} s, {sum(1 for _ in f) - 1} rows")
+    merge_proc = subprocess.run(
+        [sys.executable, os.path.join(REPO_ROOT, "merge_results.py"), "-o", os.path.join(results_dir, "result_bench.csv"),
+         *(os.path.join(results_dir, f"result_bench{i + 1}.csv") for i in range(args.containers)),
+         "--manifests", os.path.join(results_dir, "shard_bench*.json")],
+        capture_output=True, text=True)
+    print(f"merge_results.py (exit {merge_proc.returncode}):\n{merge_proc.stderr}")
+    return (max(run[0] for run in runs), max(run[1] for run in runs),
+            max((run[2] for run in runs), key=lambda rusage: rusage.ru_maxrss), results_dir)
+
+
+def report(repos, wall, returncode, rusage, results_dir, server_state):
+    print(f"grader exit code: {returncode}")
+    print(f"repos:            {len(repos)}")
+    print(f"wall time:        {wall:.2f} s")
+    print(f"throughput:       {len(repos) / wall * 60:.1f} repos/min")
+    # ru_maxrss je na Linuxe v KiB
+    print(f"peak RSS:         {rusage.ru_maxrss / 1024:.1f} MiB (grader and its largest child)")
+    print(f"API requests:     {server_state['requests']} ({server_state['throttled']} answered with 429)")
+
+    metrics_path = os.path.join(results_dir, "metrics_bench.jsonl")
+    per_phase = {}
+    run_rss = []
+    run_cpu = 0.0
+    if os.path.exists(metrics_path):
+        per_project_phase = {}
+        with open(metrics_path, encoding="utf-8") as f:
+            for line in f:
+                event = json.loads(line)
+                if "max_rss_kb" in event:
+                    run_rss.append(event["max_rss_kb"])
+                    run_cpu += event["cpu_sec"]
+                key = (event["project"], event["phase"])
+                per_project_phase[key] = per_project_phase.get(key, 0.0) + event["duration"]
+        for (_, phase), duration in per_project_phase.items():
+            per_phase.setdefault(phase, []).append(duration)
+    if run_rss:
+        print(f"student runs:     {len(run_rss)}, CPU {run_cpu:.2f} s, "
+              f"max RSS p50 {percentile(run_rss, 50) / 1024:.1f} MiB, max {max(run_rss) / 1024:.1f} MiB")
+    print(f"\n{'phase':<12} {'count':>6} {'p50':>9} {'p95':>9} {'max':>9}")
+    for phase, durations in sorted(per_phase.items()):
+        print(f"{phase:<12} {len(durations):>6} {percentile(durations, 50):>8.3f}s "
+              f"{percentile(durations, 95):>8.3f}s {max(durations):>8.3f}s")
+
+    csv_path = os.path.join(results_dir, "result_bench.csv")
+    if os.path.exists(csv_path):
+        variant_by_path = {f"student{i:04d}": variant for i, variant, _ in repos}
+        totals = {}
+        with open(csv_path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                totals.setdefault(variant_by_path.get(row["project"], "?"), []).append(row["total"])
+        print("\ntotal points by variant:")
+        for variant, values in sorted(totals.items()):
+            print(f"  {variant:<14} {', '.join(sorted(set(values)))}  ({len(values)} repos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repos", type=int, default=30, help="počet syntetických repozitárov")
+    parser.add_argument("--per-page-limit", type=int, default=20,
+                        help="maximálne per_page, ktoré server vráti (vynúti stránkovanie)")
+    parser.add_argument("--throttle-every", type=int, default=0,
+                        help="každá N-tá API požiadavka dostane 429 s Retry-After: 1 (0 = vypnuté)")
+    parser.add_argument("--subgroups", type=int, default=0,
+                        help="rozdeliť repozitáre do N podskupín (2 úrovne, spustite s --env RECURSIVE=1)")
+    parser.add_argument("--test-timeout", type=int, default=2, help="TEST_TIMEOUT pre grader (s)")
+    parser.add_argument("--timeout", type=int, default=3600, help="maximálny čas behu gradera (s)")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="ďalšie premenné prostredia pre test.py, napr. WORKERS=8")
+    parser.add_argument("--workdir", help="pracovný adresár (predvolene dočasný, po behu sa zmaže)")
+    parser.add_argument("--containers", type=int, default=1,
+                        help="počet paralelných graderov (SHARD=i/n), výsledky spojí merge_results.py")
+    parser.add_argument("--queue", choices=["none", "sqlite", "dir"], default="none",
+                        help="pri --containers namiesto SHARD zdieľaná WORK_QUEUE")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="grader-bench-")
+    extra_env = {"TEST_TIMEOUT": str(args.test_timeout)}
+    extra_env.update(item.split("=", 1) for item in args.env)
+    try:
+        print(f"Generating {args.repos} repositories in {workdir} ...")
+        repos = generate_repos(workdir, args.repos)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), None)
+        port = server.server_address[1]
+        server.RequestHandlerClass, server_state = make_handler(repos, port, args.per_page_limit,
+                                                                args.throttle_every, args.subgroups)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        clear_results(workdir)
+        print(f"Running test.py with {extra_env} ...")
+        if args.containers > 1:
+            wall, returncode, rusage, results_dir = run_containers(workdir, port, extra_env, args)
+        else:
+            wall, returncode, rusage, results_dir = run_grader(workdir, port, extra_env, args.timeout)
+        server.shutdown()
+        print()
+        report(repos, wall, returncode, rusage, results_dir, server_state)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Micro-benchmark remove_main_from_c: lineárny tokenizer vs. pôvodný regex.
+
+    python bench/bench_remove_main.py [--legacy-timeout SEC]
+
+Pôvodný regex beží v samostatnom procese s timeoutom, lebo na niektorých
+vstupoch prakticky nedobehne.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from test_helpers import strip_main  # noqa: E402
+
+LEGACY_RE = re.compile(r'int\s+main\s*\([^)]*\)\s*\{(?:[^{}]|\{[^{}]*\})*\}', re.DOTALL)
+
+FUNCTION = """int array_max_%d(const int input_array[], const int arrays_size) {
+    int max = input_array[0];
+    for (int i = 1; i < arrays_size; i++) {
+        if (input_array[i] > max) { max = input_array[i]; }
+    }
+    return max;
+}
+"""
+MAIN = 'int main(void) {\n    printf("%d {\\n", array_max_0((int[]){1, 2}, 2));\n    return 0;\n}\n'
+
+
+def typical():
+    return "#include <stdio.h>\n" + "".join(FUNCTION % i for i in range(10)) + MAIN
+
+
+def one_megabyte():
+    body = []
+    size = 0
+    i = 0
+    while size < 1024 * 1024:
+        body.append(FUNCTION % i)
+        size += len(body[-1])
+        i += 1
+    return "#include <stdio.h>\n" + "".join(body) + MAIN
+
+
+def deep_nesting(depth=5000):
+    loops = "".join("    for (int i%d = 0; i%d < 2; i%d++) {\n" % (d, d, d) for d in range(depth))
+    return "int main(void) {\n    int x = 0;\n" + loops + "x++;\n" + "}\n" * depth + "    return x;\n}\n"
+
+
+def unbalanced_mains(count=20000):
+    # veľa začatých definícií main bez uzavretia: pôvodný regex skúša každú až po koniec súboru
+    return "int main(void) { { x = 1; \n" * count
+
+
+def unclosed_parameter_lists(count=50000):
+    # [^)]* z pôvodného regexu beží od každého "int main(" až na koniec súboru: O(n^2)
+    return "int main(int argc, " * count
+
+
+def unterminated_comment():
+    return typical() + "/* " + "int main() { {" * 50000
+
+
+CASES = [
+    ("typical submission", typical),
+    ("1 MB of functions", one_megabyte),
+    ("5000 nested loops", deep_nesting),
+    ("20000 unbalanced mains", unbalanced_mains),
+    ("50000 unclosed main(", unclosed_parameter_lists),
+    ("unterminated comment", unterminated_comment),
+]
+
+
+def legacy_strip(code):
+    return LEGACY_RE.sub("", code)
+
+
+def _legacy_worker(code, queue):
+    start = time.perf_counter()
+    result = legacy_strip(code)
+    queue.put((time.perf_counter() - start, main_removed(result)))
+
+
+def main_removed(code):
+    return re.search(r"\bint\s+main\s*\(", code) is None
+
+
+def time_legacy(code, timeout):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_legacy_worker, args=(code, queue))
+    proc.start()
+    proc.join(timeout)
+    if proc.is_alive():
+        proc.kill()
+        proc.join()
+        return None, None
+    return queue.get()
+
+
+def time_tokenizer(code, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = strip_main(code)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, main_removed(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legacy-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # "removed" = vo výstupe už nie je "int main(" (pri nevyvážených vstupoch nie je čo odstrániť)
+    print(f"{'case':<26} {'size':>10} {'tokenizer':>12} {'removed':>8} {'legacy regex':>14} {'removed':>8}")
+    for name, make in CASES:
+        code = make()
+        tokenizer, tokenizer_removed = time_tokenizer(code)
+        legacy, legacy_removed = time_legacy(code, args.legacy_timeout)
+        legacy_text = f">{args.legacy_timeout:.0f} s" if legacy is None else f"{legacy * 1000:.1f} ms"
+        legacy_removed_text = "-" if legacy_removed is None else str(legacy_removed)
+        print(f"{name:<26} {len(code):>10} {tokenizer * 1000:>9.1f} ms {str(tokenizer_removed):>8}"
+              f" {legacy_text:>14} {legacy_removed_text:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Kontrola pomerných bodov pri jednom neúspešnom vektore (harness aj ctypes_runner.py).
+
+    python bench/check_partial_points.py
+
+Študentská funkcia zlyhá v jednom z 300 prípadov; harness aj ctypes_runner.py
+musia dať menej ako plný bod (0.99), nie 1.00 po zaokrúhlení. Návratový kód 1 = chyba.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO_ROOT)
+
+from test_helpers import generate_vector_harness  # noqa: E402
+
+CASES = 300
+SPEC = {
+    "returns": "int",
+    "params": ["int"],
+    "cases": [((i,), 2 * i) for i in range(CASES)],
+}
+STUDENTS = {
+    # (zdroják, očakávaný výstup)
+    "all_pass": ("int twice(int x) { return 2 * x; }\n", "1.00"),
+    "one_fails": ("int twice(int x) { return x == 7 ? 0 : 2 * x; }\n", "0.99"),
+    "all_fail": ("int twice(int x) { return -1; }\n", "0.00"),
+}
+
+
+def task_points(output):
+    for line in output.splitlines():
+        if line.startswith("TASK:twice="):
+            return line.split("=", 1)[1]
+    return None
+
+
+def check_harness(tmp):
+    harness_c = os.path.join(tmp, "harness.c")
+    with open(harness_c, "w", encoding="utf-8") as f:
+        f.write(generate_vector_harness("twice", "twice", SPEC))
+    problems = []
+    for name, (source, expected) in STUDENTS.items():
+        student_c = os.path.join(tmp, f"{name}.c")
+        binary = os.path.join(tmp, name)
+        with open(student_c, "w", encoding="utf-8") as f:
+            f.write(source)
+        subprocess.run(["gcc", harness_c, student_c, "-o", binary, "-lm"], check=True)
+        points = task_points(subprocess.run([binary], capture_output=True, text=True).stdout)
+        print(f"harness {name}: TASK:twice={points} (expected {expected})")
+        if points != expected:
+            problems.append(f"harness {name}")
+    return problems
+
+
+def check_ctypes(tmp):
+    job_path = os.path.join(tmp, "job.json")
+    with open(job_path, "w", encoding="utf-8") as f:
+        json.dump({"timeout": 5, "batch_size": 64, "tasks": [{"task": "twice", "symbol": "twice", "spec": SPEC}]}, f)
+    problems = []
+    for name, (source, expected) in STUDENTS.items():
+        student_c = os.path.join(tmp, f"{name}.c")
+        library = os.path.join(tmp, f"lib{name}.so")
+        with open(student_c, "w", encoding="utf-8") as f:
+            f.write(source)
+        subprocess.run(["gcc", "-shared", "-fPIC", student_c, "-o", library], check=True)
+        proc = subprocess.run([sys.executable, os.path.join(REPO_ROOT, "ctypes_runner.py"), library, job_path],
+                              capture_output=True, text=True)
+        points = task_points(proc.stdout)
+        print(f"ctypes  {name}: TASK:twice={points} (expected {expected})")
+        if points != expected:
+            problems.append(f"ctypes {name}")
+    return problems
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="partial-points-") as tmp:
+        problems = check_harness(tmp) + check_ctypes(tmp)
+    for problem in problems:
+        print(f"FAILED: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
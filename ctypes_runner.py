@@ -0,0 +1,188 @@
+"""Testovacie vektory volané priamo cez ctypes zo zdieľanej knižnice študenta.
+
+    python ctypes_runner.py <libstudent.so> <job.json>
+
+Spúšťa ho test.py cez sandbox.run_limited (rlimity, skupina procesov,
+ohraničený výstup). Knižnica sa načíta raz, každá dávka prípadov beží
+vo forku s alarmom, takže segfault alebo nekonečný cyklus zhodí len
+dávku. Výstup je rovnaký protokol ako pri C harnessoch a driveri:
+TASK:<task>=<body>, CASES:<task>=<prešlo>/<spolu>, STATUS:<task>=...
+NumPy je voliteľné; ak nie je k dispozícii, použijú sa ctypes polia.
+"""
+import ctypes
+import json
+import math
+import os
+import signal
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+C_TYPES = {
+    "int": ctypes.c_int,
+    "long": ctypes.c_long,
+    "unsigned": ctypes.c_uint,
+    "float": ctypes.c_float,
+    "double": ctypes.c_double,
+}
+NUMPY_TYPES = {"int": "intc", "long": "int_", "unsigned": "uintc", "float": "float32", "double": "float64"}
+
+
+def parse_params(params):
+    kinds = []
+    for param in params:
+        if param.startswith("out ") and param.endswith("[]"):
+            kinds.append(("out", param[4:-2].strip()))
+        elif param.endswith("[]"):
+            kinds.append(("in", param[:-2].strip()))
+        else:
+            kinds.append(("scalar", param))
+    return kinds
+
+
+def as_c_value(value, c_type):
+    # očakávané hodnoty sa zaokrúhlia na typ C rovnako ako v generovanom harnesse
+    return C_TYPES[c_type](value).value
+
+
+def make_pool(values, c_type):
+    """Súvislý buffer hodnôt; vracia (adresa, objekt, ktorý ho drží nažive)."""
+    if numpy is not None:
+        array = numpy.ascontiguousarray(values, dtype=NUMPY_TYPES[c_type])
+        return array.ctypes.data, array
+    array = (C_TYPES[c_type] * max(1, len(values)))(*values)
+    return ctypes.addressof(array), array
+
+
+def equal(actual, expected, c_type, tolerance):
+    if c_type in ("float", "double"):
+        return abs(actual - expected) <= tolerance
+    return actual == expected
+
+
+def run_batch(function, kinds, returns, cases, tolerance):
+    """Zavolá funkciu pre všetky prípady dávky; vracia počet úspešných."""
+    pools = []
+    for i, (kind, c_type) in enumerate(kinds):
+        if kind == "scalar":
+            pools.append(None)
+            continue
+        values = [item for args, _ in cases for item in args[i]]
+        pools.append(make_pool(values, c_type))
+    out_capacity = max([1] + [len(args[i]) for args, _ in cases for i, (kind, _) in enumerate(kinds)
+                              if kind != "scalar"])
+
+    results = []
+    out_ok = []
+    offsets = [0] * len(kinds)
+    for args, _ in cases:
+        call_args = []
+        buffers = []
+        for i, (kind, c_type) in enumerate(kinds):
+            if kind == "scalar":
+                call_args.append(args[i])
+                continue
+            size = ctypes.sizeof(C_TYPES[c_type])
+            if kind == "in":
+                call_args.append(ctypes.cast(pools[i][0] + offsets[i] * size, ctypes.POINTER(C_TYPES[c_type])))
+            else:
+                buffer = (C_TYPES[c_type] * out_capacity)()
+                buffers.append((buffer, args[i], c_type))
+                call_args.append(buffer)
+            offsets[i] += len(args[i])
+        results.append(function(*call_args))
+        out_ok.append(all(equal(buffer[k], as_c_value(value, c_type), c_type, tolerance)
+                          for buffer, expected, c_type in buffers for k, value in enumerate(expected)))
+
+    if returns == "void":
+        return sum(out_ok)
+    expected = [as_c_value(value, returns) for _, value in cases]
+    if numpy is not None:
+        actual = numpy.asarray(results, dtype=NUMPY_TYPES[returns])
+        wanted = numpy.asarray(expected, dtype=NUMPY_TYPES[returns])
+        if returns in ("float", "double"):
+            matches = numpy.abs(actual.astype("float64") - wanted.astype("float64")) <= tolerance
+        else:
+            matches = actual == wanted
+        return int(numpy.count_nonzero(matches & numpy.asarray(out_ok, dtype=bool)))
+    return sum(1 for result, value, ok in zip(results, expected, out_ok)
+               if ok and equal(result, value, returns, tolerance))
+
+
+def run_forked(function, kinds, returns, cases, tolerance, timeout):
+    """run_batch vo forku s alarmom; vracia (počet úspešných, stav ako v driveri)."""
+    read_fd, write_fd = os.pipe()
+    sys.stdout.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        # výpisy študentského kódu nesmú rozbiť riadky protokolu
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, 1)
+        os.dup2(devnull, 2)
+        signal.alarm(timeout)
+        try:
+            passed = run_batch(function, kinds, returns, cases, tolerance)
+            os.write(write_fd, str(passed).encode("ascii"))
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        data = pipe.read()
+    _, status = os.waitpid(pid, 0)
+    if os.WIFEXITED(status):
+        if os.WEXITSTATUS(status) == 0 and data:
+            return int(data), "exit:0"
+        return 0, f"exit:{os.WEXITSTATUS(status)}"
+    if os.WTERMSIG(status) == signal.SIGALRM:
+        return 0, "timeout"
+    return 0, f"signal:{os.WTERMSIG(status)}"
+
+
+def main():
+    so_path, job_path = sys.argv[1:3]
+    with open(job_path, encoding="utf-8") as f:
+        job = json.load(f)
+    try:
+        library = ctypes.CDLL(os.path.abspath(so_path))
+    except OSError as e:
+        print(f"LOAD_FAILED:{e}", flush=True)
+        return 1
+
+    batch_size = job.get("batch_size", 64)
+    for item in job["tasks"]:
+        task, spec = item["task"], item["spec"]
+        kinds = parse_params(spec["params"])
+        returns = spec.get("returns", "int")
+        function = getattr(library, item["symbol"])
+        function.restype = None if returns == "void" else C_TYPES[returns]
+        function.argtypes = [C_TYPES[c_type] if kind == "scalar" else ctypes.POINTER(C_TYPES[c_type])
+                             for kind, c_type in kinds]
+        cases = spec["cases"]
+        passed = 0
+        status = "exit:0"
+        for start in range(0, len(cases), batch_size):
+            batch_passed, batch_status = run_forked(function, kinds, returns, cases[start:start + batch_size],
+                                                    spec.get("tolerance", 1e-6), job["timeout"])
+            passed += batch_passed
+            if batch_status != "exit:0":
+                print(f"FAIL:{task}=cases {start}..{start + batch_size - 1}: {batch_status}")
+                if status == "exit:0":
+                    status = batch_status
+                if batch_status == "timeout":
+                    # ďalšie dávky by pravdepodobne tiež visele, zvyšok sa ráta ako neúspešný
+                    break
+        # nadol ako v generovanom harnesse, 299/300 prípadov nesmie dať 1.00
+        points = math.floor(float(spec.get("points", 1)) * passed * 100 / len(cases) + 1e-9) / 100
+        print(f"CASES:{task}={passed}/{len(cases)}")
+        print(f"TASK:{task}={points:.2f}")
+        print(f"STATUS:{task}={status}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import request_with_retry
+
+# (connect, read) timeout pre všetky REST volania
+REQUEST_TIMEOUT = (10, 60)
+PER_PAGE = 100
+
+
+def make_session(token, pool_size=16):
+    """Zdieľaná session s connection poolom pre všetky GitLab API volania."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["PRIVATE-TOKEN"] = token
+    return session
+
+
+def _etag_cache_path(cache_dir, url, params):
+    key = url + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def get_page(session, url, params, cache_dir=None):
+    """GET jednej stránky; vracia (json_body, total_pages, next_url).
+
+    Ak je zadaný cache_dir, posiela sa If-None-Match s uloženým ETag-om
+    a pri 304 sa použije uložené telo odpovede.
+    """
+    cached = None
+    request_headers = {}
+    cache_path = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = _etag_cache_path(cache_dir, url, params)
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            request_headers["If-None-Match"] = cached["etag"]
+        except (OSError, ValueError, KeyError):
+            cached = None
+
+    r = request_with_retry(session, "GET", url, params=params, headers=request_headers, timeout=REQUEST_TIMEOUT)
+    if r.status_code == 304 and cached is not None:
+        return cached["body"], cached.get("total_pages"), cached.get("next_url")
+    r.raise_for_status()
+
+    body = r.json()
+    total_pages = r.headers.get("X-Total-Pages")
+    total_pages = int(total_pages) if total_pages else None
+    next_url = r.links.get("next", {}).get("url")
+    if cache_path and r.headers.get("ETag"):
+        _write_json_atomic(cache_path, {
+            "etag": r.headers["ETag"],
+            "body": body,
+            "total_pages": total_pages,
+            "next_url": next_url,
+        })
+    return body, total_pages, next_url
+
+
+def iter_paginated(session, url, params=None, max_workers=4, cache_dir=None):
+    """Generátor položiek zo stránkovaného GitLab endpointu.
+
+    Prvá stránka sa stiahne hneď; ak server pošle X-Total-Pages, ostatné
+    stránky sa sťahujú súbežne (a vracajú v poradí stránok), inak sa ide
+    sekvenčne po hlavičke Link rel="next". Stránka, ktorá sa nedá stiahnuť
+    ani po opakovaniach, ukončí generátor výnimkou (zoznam by bol neúplný).
+    """
+    params = dict(params or {})
+    params.setdefault("per_page", PER_PAGE)
+    params["page"] = 1
+    body, total_pages, next_url = get_page(session, url, params, cache_dir)
+    yield from body
+
+    if total_pages:
+        if total_pages <= 1:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                (page, executor.submit(get_page, session, url, dict(params, page=page), cache_dir))
+                for page in range(2, total_pages + 1)
+            ]
+            for page, future in futures:
+                try:
+                    body, _, _ = future.result()
+                except Exception as e:
+                    print(f"Failed to load page {page}/{total_pages} of {url}: {e}")
+                    for _, pending in futures:
+                        pending.cancel()
+                    raise
+                yield from body
+        return
+
+    # X-Total-Pages GitLab vynecháva pri veľkých kolekciách, ostáva Link
+    while next_url:
+        body, _, next_url = get_page(session, next_url, {}, cache_dir)
+        yield from body
+
+
+def iter_group_projects(session, base_api, group_id, max_workers=4, cache_dir=None, errors=None):
+    """Streamuje projekty skupiny (bez podskupín) tak, ako prichádzajú z API.
+
+    Pri chybe API sa zoznam skončí predčasne a chyba sa pridá do errors
+    (ak je zadaný), podľa toho volajúci vie, že zoznam nie je úplný.
+    """
+    url = f"{base_api}/groups/{group_id}/projects"
+    try:
+        yield from iter_paginated(session, url, {"order_by": "id", "sort": "asc"},
+                                  max_workers=max_workers, cache_dir=cache_dir)
+    except requests.RequestException as e:
+        print(f"Failed to load projects for group {group_id}: {e}")
+        if errors is not None:
+            errors.append(f"projects of group {group_id}: {e}")
+
+
+def iter_group_projects_recursive(session, base_api, group_id, max_workers=4, cache_dir=None, errors=None):
+    """Streamuje projekty skupiny a všetkých jej podskupín (do šírky, súbežne).
+
+    Naraz sa prechádza najviac max_workers skupín, stránky jednej skupiny
+    idú sekvenčne. Projekt sa vráti hneď, ako príde, a len raz (zdieľaný
+    projekt môže byť vo viacerých podskupinách). Chyby API sa pridajú do errors.
+    """
+    results = queue.Queue()
+
+    def crawl(gid):
+        try:
+            # najprv podskupiny, aby sa ďalšia úroveň začala prechádzať čo najskôr
+            for subgroup in iter_paginated(session, f"{base_api}/groups/{gid}/subgroups",
+                                           {"order_by": "id", "sort": "asc"}, max_workers=1, cache_dir=cache_dir):
+                results.put(("group", subgroup))
+            for project in iter_group_projects(session, base_api, gid, max_workers=1, cache_dir=cache_dir,
+                                               errors=errors):
+                results.put(("project", project))
+        except requests.RequestException as e:
+            print(f"Failed to load subgroups of group {gid}: {e}")
+            if errors is not None:
+                errors.append(f"subgroups of group {gid}: {e}")
+        finally:
+            results.put(("done", gid))
+
+    seen_groups = {str(group_id)}
+    seen_projects = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        executor.submit(crawl, group_id)
+        running = 1
+        while running:
+            kind, item = results.get()
+            if kind == "done":
+                running -= 1
+            elif kind == "group":
+                subgroup_id = str(item["id"])
+                if subgroup_id not in seen_groups:
+                    seen_groups.add(subgroup_id)
+                    print(f"Found subgroup {item.get('full_path', subgroup_id)}")
+                    executor.submit(crawl, subgroup_id)
+                    running += 1
+            elif item.get("id") not in seen_projects:
+                seen_projects.add(item.get("id"))
+                yield item
+
+
+def list_repository_tree(session, base_api, project_id, path, ref):
+    """Položky stromu repozitára v adresári path (bez sťahovania obsahu súborov)."""
+    url = f"{base_api}/projects/{project_id}/repository/tree"
+    try:
+        return list(iter_paginated(session, url, {"path": path, "ref": ref}))
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return []
+        raise
+
+
+def get_raw_file(session, base_api, project_id, file_path, ref):
+    """Vracia (obsah súboru v bajtoch, SHA commitu, z ktorého pochádza)."""
+    url = f"{base_api}/projects/{project_id}/repository/files/{quote(file_path, safe='')}/raw"
+    r = request_with_retry(session, "GET", url, params={"ref": ref}, timeout=REQUEST_TIMEOUT)
+    r.raise_for_status()
+    return r.content, r.headers.get("X-Gitlab-Commit-Id")
@@ -0,0 +1,41 @@
+import json
+import os
+import threading
+
+
+class GradingState:
+    """Perzistentný stav projektov (kľúč -> dict), napr. ohodnotený commit alebo riadok CSV.
+
+    Ukladá sa ako jeden JSON súbor, zapisuje sa atomicky po každej zmene.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.projects = json.load(f)
+        except (OSError, ValueError):
+            self.projects = {}
+
+    def get(self, key):
+        with self._lock:
+            return self.projects.get(key)
+
+    def update(self, key, **fields):
+        with self._lock:
+            entry = dict(self.projects.get(key) or {})
+            entry.update(fields)
+            self.projects[key] = entry
+            self._save()
+
+    def remove(self, key):
+        with self._lock:
+            if self.projects.pop(key, None) is not None:
+                self._save()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.projects, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
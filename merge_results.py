@@ -0,0 +1,141 @@
+"""Spojí result_*.csv z viacerých kontajnerov (SHARD / WORK_QUEUE) do jedného CSV.
+
+    python merge_results.py -o result.csv results/result_*.csv --manifests results/shard_*.json
+
+Riadky sa zoradia podľa project_path. Projekt ohodnotený viackrát sa
+nahlási (pri rôznych riadkoch ako konflikt, ostane prvý). S manifestmi
+sa nahlásia aj chýbajúce shardy a projekty, ktoré nikto neohodnotil,
+po skupinách a len pre skupiny, z ktorých sú v zlučovaných CSV riadky.
+Pri akomkoľvek probléme je návratový kód 1.
+"""
+import argparse
+import csv
+import glob
+import json
+import sys
+
+
+def row_identity(row):
+    # project_path (path_with_namespace); riadok z výnimky má len meno projektu v prvom stĺpci
+    return row[2] if len(row) > 2 and row[2] else row[0]
+
+
+def read_results(paths):
+    header = None
+    rows = []
+    for path in paths:
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            file_header = next(reader, None)
+            if file_header is None:
+                continue
+            if header is None:
+                header = file_header
+            elif file_header != header:
+                raise ValueError(f"{path}: header {file_header} differs from {header}")
+            rows.extend((path, row) for row in reader if row)
+    return header, rows
+
+
+def expected_projects(manifests):
+    """Po skupinách: {skupina: (shardy podľa manifestov alebo None, {path_with_namespace: path})}.
+
+    Shardy sú None, ak skupinu celú ohodnotil niektorý kontajner bez SHARD.
+    """
+    groups = {}
+    for manifest in manifests:
+        for group_id, entries in manifest.get("discovered", {}).items():
+            shards, projects = groups.setdefault(group_id, ({}, {}))
+            if not manifest.get("shard"):
+                groups[group_id] = shards, projects = None, projects
+            elif shards is not None:
+                index, count = (int(part) for part in manifest["shard"].split("/"))
+                shards.setdefault(count, set()).add(index)
+            for entry in entries:
+                projects[entry["path_with_namespace"]] = entry.get("path")
+    return groups
+
+
+def merge(csv_paths, manifest_paths=()):
+    """Vracia (hlavička, zlúčené riadky, zoznam problémov)."""
+    header, rows = read_results(csv_paths)
+    problems = []
+    merged = {}
+    sources = {}
+    for path, row in rows:
+        identity = row_identity(row)
+        if identity in merged:
+            if merged[identity] == row:
+                problems.append(f"graded twice: {identity} ({sources[identity]}, {path}), identical rows")
+            else:
+                problems.append(f"graded twice: {identity} ({sources[identity]}, {path}), CONFLICT: "
+                                f"total {merged[identity][-1]} vs {row[-1]}, keeping the first")
+            continue
+        merged[identity] = row
+        sources[identity] = path
+
+    manifests = []
+    for path in manifest_paths:
+        with open(path, encoding="utf-8") as f:
+            manifests.append(json.load(f))
+    if manifests:
+        for manifest in manifests:
+            for error in manifest.get("listing_errors") or []:
+                problems.append(f"incomplete project listing in {manifest.get('container')}: {error}")
+        groups = expected_projects(manifests)
+        known = set()
+        for group_id, (shards, projects) in sorted(groups.items()):
+            known.update(projects)
+            known.update(projects.values())
+            # manifesty môžu pokrývať aj skupiny, ktorých CSV sa práve nezlučujú
+            if not any(path_with_namespace in merged or path in merged for path_with_namespace, path in projects.items()):
+                continue
+            for count, indexes in sorted((shards or {}).items()):
+                for index in sorted(set(range(1, count + 1)) - indexes):
+                    problems.append(f"missing shard: {index}/{count} of group {group_id} (no manifest)")
+            if shards and len(shards) > 1:
+                problems.append(f"manifests of group {group_id} mix shard counts {sorted(shards)}")
+            for path_with_namespace, path in sorted(projects.items()):
+                if path_with_namespace not in merged and path not in merged:
+                    problems.append(f"missing project: {path_with_namespace} (group {group_id})")
+        for identity in sorted(merged):
+            if identity not in known:
+                problems.append(f"not discovered by any container: {identity}")
+
+    return header, [merged[identity] for identity in sorted(merged)], problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("csv_files", nargs="+", help="result_<CONTAINER_ID>.csv (rovnaká skupina a zadanie)")
+    parser.add_argument("--manifests", nargs="*", default=[], help="shard_<CONTAINER_ID>.json (glob)")
+    parser.add_argument("-o", "--output", help="výsledné CSV (predvolene stdout)")
+    args = parser.parse_args()
+    manifest_paths = sorted({path for pattern in args.manifests for path in glob.glob(pattern) or [pattern]})
+    csv_paths = [path for path in args.csv_files if path != args.output]
+
+    try:
+        header, rows, problems = merge(csv_paths, manifest_paths)
+    except (OSError, ValueError) as e:
+        print(f"merge failed: {e}", file=sys.stderr)
+        return 2
+    if header is None:
+        print("merge failed: no rows in input files", file=sys.stderr)
+        return 2
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(header)
+        writer.writerows(rows)
+    finally:
+        if args.output:
+            out.close()
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print(f"{len(rows)} projects from {len(csv_paths)} files, {len(problems)} problems", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
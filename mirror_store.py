@@ -0,0 +1,123 @@
+import os
+import shutil
+import subprocess
+import tarfile
+import threading
+
+# ref, do ktorého sa pri fetchi uloží HEAD (default branch) vzdialeného repozitára
+HEAD_REF = "refs/grader/head"
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class MirrorStore:
+    """Dlhodobé bare zrkadlá študentských repozitárov aktualizované cez git fetch.
+
+    URL s tokenom sa neukladá do configu zrkadla, fetchuje sa vždy priamo
+    z URL. run_git(cmd) spúšťa git príkaz (s retry) a vracia True/False.
+    """
+
+    def __init__(self, root, max_bytes, run_git):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.run_git = run_git
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def mirror_path(self, key):
+        return os.path.join(self.root, f"{key}.git")
+
+    def _lock(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _git(self, key, *args):
+        return ["git", "--git-dir", self.mirror_path(key), *args]
+
+    def update(self, key, repo_url):
+        """Založí zrkadlo alebo ho dotiahne; prenášajú sa len nové objekty."""
+        path = self.mirror_path(key)
+        with self._lock(key):
+            if not os.path.isdir(path):
+                init_proc = subprocess.run(["git", "init", "--bare", "--quiet", path], capture_output=True, text=True)
+                if init_proc.returncode != 0:
+                    print(f"Mirror init failed for {key}: {init_proc.stderr}")
+                    return False
+            ok = self.run_git(self._git(key, "fetch", "--prune", "--no-tags", repo_url,
+                                        "+refs/heads/*:refs/heads/*", f"+HEAD:{HEAD_REF}"))
+            if ok:
+                os.utime(path)
+            return ok
+
+    def head_sha(self, key):
+        proc = subprocess.run(self._git(key, "rev-parse", HEAD_REF), capture_output=True, text=True)
+        return proc.stdout.strip() if proc.returncode == 0 else None
+
+    def list_files(self, key, paths):
+        proc = subprocess.run(self._git(key, "ls-tree", "-r", "--name-only", HEAD_REF, "--", *paths),
+                              capture_output=True, text=True)
+        return set(proc.stdout.splitlines())
+
+    def export(self, key, target_dir, paths):
+        """Rozbalí paths z HEAD zrkadla do target_dir (git archive, bez .git)."""
+        proc = subprocess.Popen(self._git(key, "archive", "--format=tar", HEAD_REF, "--", *paths),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(target_dir, filter="data")
+                else:
+                    tar.extractall(target_dir)
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read().decode("utf-8", "replace")
+            proc.stderr.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            raise RuntimeError(f"git archive failed for {key}: {stderr}")
+
+    def gc(self, keep_keys):
+        """Zmaže zrkadlá projektov, ktoré už v skupine nie sú (keep_keys = úplný zoznam projektov).
+
+        Kľúč je <menný priestor>/<projekt>; maže sa len v menných priestoroch z keep_keys,
+        zrkadlá iných skupín v zdieľanom root ostanú.
+        """
+        keep = {self.mirror_path(key) for key in keep_keys}
+        for namespace in sorted({os.path.dirname(key) for key in keep_keys}):
+            directory = os.path.join(self.root, namespace)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                if name.endswith(".git") and path not in keep:
+                    print(f"Mirror GC: removing {os.path.join(namespace, name)}")
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def enforce_budget(self):
+        """Kým zrkadlá (vo všetkých menných priestoroch) presahujú max_bytes, zmaže najdlhšie nepoužité."""
+        mirrors = []
+        total = 0
+        for directory, names, _ in os.walk(self.root):
+            for name in [name for name in names if name.endswith(".git")]:
+                # do zrkadla sa ďalej nevnára
+                names.remove(name)
+                path = os.path.join(directory, name)
+                size = dir_size(path)
+                mirrors.append((os.stat(path).st_mtime, size, path))
+                total += size
+        for _, size, path in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            print(f"Mirror budget: removing {os.path.relpath(path, self.root)} ({size} bytes)")
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
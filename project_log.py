@@ -0,0 +1,143 @@
+import gzip
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+class ProjectLog:
+    """Log s úrovňami, ktorý sa dá nastaviť ako sys.stdout.
+
+    Záznamy vlákna, ktoré je v bloku project(), sa zbierajú v pamäti
+    a zapíšu sa naraz, takže sa logy paralelne hodnotených projektov
+    nepremiešajú. print() je záznam úrovne INFO. Pri archive_path sa
+    každý blok projektu navyše uloží ako samostatný gzip člen a do
+    index_path (JSON lines) sa zapíše jeho offset a dĺžka.
+    """
+
+    def __init__(self, path, level="DEBUG", archive_path=None, index_path=None):
+        self.level = LEVELS[level.upper()]
+        self._file = open(path, "a", encoding="utf-8")
+        self._archive = open(archive_path, "ab") if archive_path else None
+        self._index = open(index_path, "a", encoding="utf-8") if archive_path else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # file-like rozhranie pre print()
+    def write(self, text):
+        partial = getattr(self._local, "partial", "") + text
+        *lines, self._local.partial = partial.split("\n")
+        for line in lines:
+            self._record(LEVELS["INFO"], line)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def log(self, level, message):
+        self._record(LEVELS[level], str(message))
+
+    def debug(self, message):
+        self.log("DEBUG", message)
+
+    def info(self, message):
+        self.log("INFO", message)
+
+    def warning(self, message):
+        self.log("WARNING", message)
+
+    def error(self, message):
+        self.log("ERROR", message)
+
+    def _record(self, level, message):
+        if level < self.level:
+            return
+        if message:
+            name = next(name for name, value in LEVELS.items() if value == level)
+            first, *rest = message.split("\n")
+            # pokračovacie riadky (výstup gcc, programu) bez hlavičky, odsadené
+            text = "\n".join([f"{time.strftime('%H:%M:%S')} {name:<7} {first}"] + [f"    {line}" for line in rest])
+        else:
+            text = ""
+        block = getattr(self._local, "block", None)
+        if block is not None:
+            block.append(text)
+            self._local.max_level = max(self._local.max_level, level)
+            return
+        with self._lock:
+            self._file.write(text + "\n")
+            self._file.flush()
+
+    @contextmanager
+    def project(self, key):
+        """Záznamy vlákna v tomto bloku idú do logu (a archívu) ako jeden celok."""
+        self._local.block = []
+        self._local.max_level = 0
+        try:
+            yield
+        finally:
+            partial = getattr(self._local, "partial", "")
+            if partial:
+                self._local.partial = ""
+                self._record(LEVELS["INFO"], partial)
+            block, self._local.block = self._local.block, None
+            self._write_block(key, "\n".join(block) + "\n", len(block), self._local.max_level)
+
+    def _write_block(self, key, text, lines, max_level):
+        with self._lock:
+            self._file.write(text)
+            self._file.flush()
+            if self._archive is None:
+                return
+            data = gzip.compress(text.encode("utf-8"), compresslevel=6, mtime=0)
+            offset = self._archive.tell()
+            self._archive.write(data)
+            self._archive.flush()
+            max_name = next((name for name, value in LEVELS.items() if value == max_level), "INFO")
+            self._index.write(json.dumps({"project": key, "offset": offset, "length": len(data),
+                                          "lines": lines, "max_level": max_name}) + "\n")
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            if self._archive is not None:
+                self._archive.close()
+                self._index.close()
+
+
+def read_project_log(archive_path, index_path, key):
+    """Bloky logu projektu key z archívu (bez čítania zvyšku archívu)."""
+    with open(index_path, encoding="utf-8") as f:
+        entries = [entry for entry in map(json.loads, f) if entry["project"] == key]
+    blocks = []
+    with open(archive_path, "rb") as archive:
+        for entry in entries:
+            archive.seek(entry["offset"])
+            blocks.append(gzip.decompress(archive.read(entry["length"])).decode("utf-8"))
+    return blocks
+
+
+if __name__ == "__main__":
+    # python project_log.py <logs.gz> <logs.idx.jsonl> <project>
+    # python project_log.py <logs.gz> <logs.idx.jsonl> --level WARNING   (projekty s varovaním/chybou)
+    if len(sys.argv) == 5 and sys.argv[3] == "--level":
+        minimum = LEVELS[sys.argv[4].upper()]
+        with open(sys.argv[2], encoding="utf-8") as f:
+            for entry in map(json.loads, f):
+                if LEVELS[entry["max_level"]] >= minimum:
+                    print(f"{entry['project']}\t{entry['max_level']}\t{entry['lines']} lines")
+    elif len(sys.argv) == 4:
+        blocks = read_project_log(*sys.argv[1:4])
+        if not blocks:
+            print(f"No log for {sys.argv[3]}", file=sys.stderr)
+            sys.exit(1)
+        for block in blocks:
+            sys.stdout.write(block)
+    else:
+        print("usage: python project_log.py <archive.gz> <index.jsonl> <project> | --level <LEVEL>")
+        sys.exit(2)
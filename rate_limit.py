@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class RateLimiter:
+    """Token bucket zdieľaný všetkými API volaniami a git operáciami v procese.
+
+    Okrem tokenov drží aj spoločnú pauzu: keď server povie Retry-After,
+    čakajú všetky vlákna, nie len to, ktoré 429 dostalo.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "throttled": 0, "retried": 0, "waited_sec": 0.0}
+
+    def configure(self, rate, burst):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self._tokens = min(self._tokens, burst)
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.counters["requests"] += 1
+                        self.counters["waited_sec"] += waited
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, waited_sec=round(self.counters["waited_sec"], 3))
+
+
+# jeden limiter na proces, test.py ho nastaví cez configure()
+limiter = RateLimiter(rate=10.0, burst=20)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    # exponenciálny backoff s "full jitter"
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def server_delay(headers):
+    """Koľko sekúnd server žiada počkať (Retry-After / RateLimit-*), alebo None."""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if headers.get("RateLimit-Remaining") == "0" and headers.get("RateLimit-Reset"):
+        try:
+            return max(0.0, float(headers["RateLimit-Reset"]) - time.time())
+        except ValueError:
+            pass
+    return None
+
+
+def request_with_retry(session, method, url, max_retries=6, **kwargs):
+    """session.request cez zdieľaný limiter, s retry pri 429/5xx a výpadku spojenia."""
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            r = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            limiter.count("retried")
+            time.sleep(backoff_delay(attempt))
+            continue
+
+        delay = server_delay(r.headers)
+        if r.status_code not in RETRY_STATUSES or attempt == max_retries:
+            if delay and r.headers.get("RateLimit-Remaining") == "0":
+                # kvóta je minutá, ďalšie volania nech počkajú na reset
+                limiter.pause(delay)
+            return r
+        if r.status_code == 429:
+            limiter.count("throttled")
+        limiter.count("retried")
+        if delay is not None or r.status_code == 429:
+            # throttling platí pre celý proces, nie len pre toto vlákno
+            limiter.pause(delay if delay is not None else backoff_delay(attempt))
+        else:
+            time.sleep(backoff_delay(attempt))
+    return r
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import Future
+
+
+def normalize_source(code):
+    # CRLF, koncové medzery a prázdne riadky na konci nemenia výsledok hodnotenia
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).rstrip("\n") + "\n"
+
+
+def source_fingerprint(source_path):
+    with open(source_path, "r", encoding="utf-8", errors="replace") as f:
+        return hashlib.sha256(normalize_source(f.read()).encode("utf-8")).hexdigest()
+
+
+def grading_key(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Perzistentná cache výsledkov hodnotenia, jeden JSON súbor na kľúč.
+
+    Súbory sú v <cache_dir>/<assignment>/, LRU poradie drží mtime (pri hite
+    sa súbor "dotkne"). Súbežné požiadavky na rovnaký kľúč v jednom behu
+    sa zlúčia do jedného výpočtu.
+    """
+
+    def __init__(self, cache_dir, assignment, max_bytes):
+        self.cache_dir = cache_dir
+        self.assignment_dir = os.path.join(cache_dir, assignment)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight = {}
+        os.makedirs(self.assignment_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.assignment_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def get_or_compute(self, key, compute):
+        """Vráti (value, source), source je "cache", "inflight" alebo "computed".
+
+        compute() vracia (value, cacheable); necacheovateľné výsledky
+        (napr. timeouty) sa zdieľajú len v rámci behu, na disk sa nezapíšu.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result(), "inflight"
+
+        try:
+            value = self.get(key)
+            source = "cache"
+            if value is None:
+                value, cacheable = compute()
+                source = "computed"
+                if cacheable:
+                    self.put(key, value)
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                del self._inflight[key]
+            raise
+        future.set_result(value)
+        return value, source
+
+    def evict(self):
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def invalidate(cache_dir, assignment):
+    shutil.rmtree(os.path.join(cache_dir, assignment), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # python result_cache.py invalidate <assignment> [cache_dir]
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "invalidate":
+        print("usage: python result_cache.py invalidate <assignment> [cache_dir]")
+        sys.exit(2)
+    cache_dir = sys.argv[3] if len(sys.argv) == 4 else os.environ.get("RESULT_CACHE_DIR", "./.cache/results")
+    invalidate(cache_dir, sys.argv[2])
+    print(f"Invalidated cached results of {sys.argv[2]} in {cache_dir}")
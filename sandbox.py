@@ -0,0 +1,414 @@
+import hashlib
+import os
+import queue
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Študentský program sa nespúšťa priamo z gradera: preexec_fn (rlimity, afinita medzi fork a exec)
+# nie je bezpečné pri bežiacich vláknach a ru_maxrss dieťaťa gradera obsahuje RSS gradera,
+# ktorú si jadro pri exec prenesie (pri fork, vfork aj posix_spawn). Malý launcher v C urobí fork
+# sám, v dieťati nastaví skupinu procesov, rlimity a afinitu, spustí program, počká naň
+# a do rúry report_fd zapíše:
+#   pid <pid>                        (hneď po fork; skupina procesov programu má pgid == pid)
+#   exec_error <errno>               (exec zlyhal)
+#   status <wait status> <utime µs> <stime µs> <maxrss KiB>
+LAUNCHER_SOURCE = r"""/* generated by sandbox.build_launcher, do not edit */
+#define _GNU_SOURCE
+#include <errno.h>
+#include <fcntl.h>
+#include <sched.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+/* launcher <report_fd> <cpu_sec> <as_bytes> <nproc> <fsize_bytes> <cpus> <program> [args...], "-" = bez limitu */
+static void limit(int resource, const char *value, rlim_t hard_extra) {
+    if (strcmp(value, "-") == 0) {
+        return;
+    }
+    rlim_t soft = strtoull(value, NULL, 10);
+    struct rlimit rl = {soft, soft + hard_extra};
+    setrlimit(resource, &rl);
+}
+
+int main(int argc, char **argv) {
+    if (argc < 8) {
+        fprintf(stderr, "sandbox launcher: bad arguments\n");
+        return 125;
+    }
+    int report = atoi(argv[1]);
+    fcntl(report, F_SETFD, FD_CLOEXEC);
+    pid_t pid = fork();
+    if (pid < 0) {
+        return 125;
+    }
+    if (pid == 0) {
+        setpgid(0, 0);
+        /* soft limit CPU pošle SIGXCPU, hard o sekundu neskôr SIGKILL */
+        limit(RLIMIT_CPU, argv[2], 1);
+        limit(RLIMIT_AS, argv[3], 0);
+        limit(RLIMIT_NPROC, argv[4], 0);
+        limit(RLIMIT_FSIZE, argv[5], 0);
+        if (strcmp(argv[6], "-") != 0) {
+            cpu_set_t cpus;
+            CPU_ZERO(&cpus);
+            for (char *p = argv[6]; *p;) {
+                CPU_SET(strtol(p, &p, 10), &cpus);
+                if (*p == ',') {
+                    p++;
+                }
+            }
+            sched_setaffinity(0, sizeof(cpus), &cpus);
+        }
+        execvp(argv[7], argv + 7);
+        dprintf(report, "exec_error %d\n", errno);
+        _exit(127);
+    }
+    setpgid(pid, pid);
+    dprintf(report, "pid %d\n", (int)pid);
+    int status;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            return 125;
+        }
+    }
+    dprintf(report, "status %d %lld %lld %ld\n", status,
+            (long long)usage.ru_utime.tv_sec * 1000000 + usage.ru_utime.tv_usec,
+            (long long)usage.ru_stime.tv_sec * 1000000 + usage.ru_stime.tv_usec, usage.ru_maxrss);
+    return 0;
+}
+"""
+
+_launcher = {"path": None}
+_launcher_lock = threading.Lock()
+
+
+def build_launcher(cache_dir):
+    """Skompiluje launcher do cache_dir (meno podľa obsahu) a použije ho v run_limited."""
+    with _launcher_lock:
+        os.makedirs(cache_dir, exist_ok=True)
+        digest = hashlib.sha256(LAUNCHER_SOURCE.encode("utf-8")).hexdigest()[:16]
+        path = os.path.abspath(os.path.join(cache_dir, f"sandbox_launcher_{digest}"))
+        if not os.path.exists(path):
+            c_path = f"{path}.{os.getpid()}.c"
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(c_path, "w", encoding="utf-8") as f:
+                f.write(LAUNCHER_SOURCE)
+            try:
+                gcc_proc = subprocess.run(["gcc", "-O2", c_path, "-o", tmp_path], capture_output=True, text=True)
+                if gcc_proc.returncode != 0:
+                    raise RuntimeError(f"sandbox launcher does not compile:\n{gcc_proc.stderr}")
+                os.replace(tmp_path, path)
+            finally:
+                os.remove(c_path)
+        _launcher["path"] = path
+        return path
+
+
+def launcher_path():
+    # bez build_launcher (napr. samostatné použitie modulu) sa launcher postaví do dočasného adresára
+    return _launcher["path"] or build_launcher(os.path.join(tempfile.gettempdir(), "grader-sandbox"))
+
+
+class LaunchReport:
+    """Riadky, ktoré launcher zapisuje do rúry: meno -> zoznam čísel."""
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.fields = {}
+        self._buffer = b""
+
+    def read_until(self, name):
+        """Hodnoty riadku name, None ak launcher skončil bez neho."""
+        while name not in self.fields:
+            try:
+                chunk = os.read(self.fd, 4096)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                return None
+            self._buffer += chunk
+            *lines, self._buffer = self._buffer.split(b"\n")
+            for line in lines:
+                key, *values = line.decode("ascii", "replace").split()
+                self.fields[key] = [int(value) for value in values]
+        return self.fields[name]
+
+    def close(self):
+        os.close(self.fd)
+
+
+class RunResult:
+    """Výsledok run_limited: návratový kód, výstup a spotreba zdrojov podľa wait4.
+
+    stdout/stderr sú orezané na max_output_bytes; protocol obsahuje riadky
+    s hľadanými prefixmi (TASK:, STATUS:) bez ohľadu na orezanie stdout,
+    ale najviac OutputCapture.MAX_PROTOCOL_LINES (plus prvý pre každý expected).
+    escaped = proces mimo skupiny (setsid, daemon) držal stdout/stderr otvorené
+    aj po zabití skupiny; výstup nemusí byť úplný, beh sa ráta ako zlyhanie sandboxu.
+    """
+
+    def __init__(self, returncode, stdout, stderr, timed_out, wall_sec, cpu_sec, max_rss_kb,
+                 protocol="", stopped_early=False, output_bytes=0, escaped=False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.wall_sec = wall_sec
+        self.cpu_sec = cpu_sec
+        self.max_rss_kb = max_rss_kb
+        self.protocol = protocol
+        self.stopped_early = stopped_early
+        self.output_bytes = output_bytes
+        self.escaped = escaped
+
+    def usage(self):
+        return {"wall_sec": round(self.wall_sec, 6), "cpu_sec": round(self.cpu_sec, 6),
+                "max_rss_kb": self.max_rss_kb, "output_bytes": self.output_bytes}
+
+
+class Limits:
+    """rlimity pre študentský binárny súbor; None = limit sa nenastavuje.
+
+    RLIMIT_NPROC sa počíta pre celé UID (vrátane vlákien gradera)
+    a root ho ignoruje, preto je len poistkou proti fork bombe.
+    """
+
+    def __init__(self, cpu_sec=None, memory_bytes=None, max_procs=None, max_file_bytes=None):
+        self.cpu_sec = cpu_sec
+        self.memory_bytes = memory_bytes
+        self.max_procs = max_procs
+        self.max_file_bytes = max_file_bytes
+
+    def key(self):
+        return f"cpu={self.cpu_sec},as={self.memory_bytes},nproc={self.max_procs},fsize={self.max_file_bytes}"
+
+    def launcher_args(self):
+        # poradie ako v LAUNCHER_SOURCE; rlimity nastaví launcher v dieťati pred exec
+        return ["-" if value is None else str(value)
+                for value in (self.cpu_sec, self.memory_bytes, self.max_procs, self.max_file_bytes)]
+
+
+class CpuPool:
+    """CPU vyhradené na merania času; každé CPU naraz drží len jeden beh.
+
+    None v zozname znamená beh bez pripnutia (napr. stroj s jedným CPU),
+    ktorý sa aj tak serializuje.
+    """
+
+    def __init__(self, cpus):
+        self._free = queue.Queue()
+        for cpu in cpus:
+            self._free.put(cpu)
+
+    @contextmanager
+    def pinned(self):
+        """Množina s jedným CPU pre run_limited(cpus=...), alebo None."""
+        cpu = self._free.get()
+        try:
+            yield None if cpu is None else {cpu}
+        finally:
+            self._free.put(cpu)
+
+
+def kill_group(pgid):
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class OutputCapture:
+    """Číta rúru po kúskoch; pamäť je ohraničená bez ohľadu na to, koľko program vypíše.
+
+    Uloží sa najviac max_bytes výstupu, zvyšok sa len prečíta a zahodí.
+    Riadky začínajúce niektorým z prefixes sa zbierajú zvlášť, najviac
+    MAX_PROTOCOL_LINES; prvý riadok pre každý expected prefix sa uloží vždy.
+    Keď prídu riadky pre všetky expected (napr. "TASK:array_max="), nastaví sa event.
+    """
+
+    MAX_LINE = 4096
+    MAX_PROTOCOL_LINES = 256
+
+    def __init__(self, max_bytes, prefixes=(), expected=(), event=None):
+        self.max_bytes = max_bytes
+        self.prefixes = tuple(prefixes)
+        self.missing = set(expected)
+        self.event = event
+        self.stored = bytearray()
+        self.total = 0
+        self.protocol = []
+        self.protocol_dropped = 0
+        self._line = bytearray()
+        self._line_overflow = False
+
+    def feed(self, chunk):
+        self.total += len(chunk)
+        room = self.max_bytes - len(self.stored)
+        if room > 0:
+            self.stored += chunk[:room]
+        if not self.prefixes:
+            return
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end < 0 else chunk[start:end]
+            if not self._line_overflow:
+                if len(self._line) + len(piece) > self.MAX_LINE:
+                    # dlhý riadok nie je riadok protokolu, zvyšok sa preskočí
+                    self._line_overflow = True
+                    self._line.clear()
+                else:
+                    self._line += piece
+            if end < 0:
+                return
+            self._end_line()
+            start = end + 1
+
+    def _end_line(self):
+        if not self._line_overflow:
+            line = self._line.decode("utf-8", "replace")
+            if line.startswith(self.prefixes):
+                first_for = [p for p in self.missing if line.startswith(p)]
+                # program, ktorý TASK:/STATUS: riadky vypisuje v cykle, nesmie zväčšovať pamäť
+                if first_for or len(self.protocol) < self.MAX_PROTOCOL_LINES:
+                    self.protocol.append(line)
+                else:
+                    self.protocol_dropped += 1
+                for prefix in first_for:
+                    self.missing.discard(prefix)
+                if not self.missing and self.event is not None:
+                    self.event.set()
+        self._line.clear()
+        self._line_overflow = False
+
+    def finish(self):
+        if self._line:
+            self._end_line()
+
+    def text(self):
+        text = self.stored.decode("utf-8", "replace")
+        if self.total > len(self.stored):
+            text += f"\n[... output truncated, {self.total - len(self.stored)} more bytes ...]\n"
+        return text
+
+    def read_from(self, fd):
+        # os.read na surovom fd, ktorý patrí len tomuto vláknu a zatvorí ho až po EOF;
+        # close z iného vlákna by pri BufferedReader čakal na zámok, ktorý drží read1
+        try:
+            for chunk in iter(lambda: os.read(fd, 65536), b""):
+                self.feed(chunk)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+        self.finish()
+
+
+def run_limited(cmd, timeout, limits=None, cwd=None, max_output_bytes=64 * 1024,
+                protocol_prefixes=(), expected=(), stop_grace=0.5, cpus=None):
+    """Spustí cmd cez launcher vo vlastnej skupine procesov s rlimitmi a wall-clock timeoutom.
+
+    Po timeoute (aj po normálnom skončení) sa zabije celá skupina, takže
+    nezostanú visieť vnúčatá. Čas CPU a max RSS sú z rusage programu (wait4
+    v launcheri), bez pamäte gradera. Keď na stdout prídu riadky pre všetky
+    expected prefixy a program do stop_grace sekúnd sám neskončí, zastaví sa
+    (stopped_early). cpus = množina CPU, na ktoré sa program pripne.
+    """
+    launcher_cmd = [launcher_path(), None, *(limits or Limits()).launcher_args(),
+                    ",".join(str(cpu) for cpu in sorted(cpus)) if cpus else "-", *cmd]
+    start = time.perf_counter()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    report_r, report_w = os.pipe()
+    launcher_cmd[1] = str(report_w)
+    try:
+        proc = subprocess.Popen(launcher_cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=stdout_w,
+                                stderr=stderr_w, start_new_session=True, pass_fds=(report_w,))
+    except BaseException:
+        os.close(stdout_r)
+        os.close(stderr_r)
+        os.close(report_r)
+        raise
+    finally:
+        os.close(stdout_w)
+        os.close(stderr_w)
+        os.close(report_w)
+    report = LaunchReport(report_r)
+    finished = threading.Event()
+    stdout = OutputCapture(max_output_bytes, protocol_prefixes, expected, finished if expected else None)
+    stderr = OutputCapture(max_output_bytes)
+    readers = [threading.Thread(target=stdout.read_from, args=(stdout_r,), daemon=True),
+               threading.Thread(target=stderr.read_from, args=(stderr_r,), daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    waited = {}
+
+    def wait_child():
+        _, waited["status"], waited["rusage"] = os.wait4(proc.pid, 0)
+        finished.set()
+
+    waiter = threading.Thread(target=wait_child, daemon=True)
+    waiter.start()
+    # skupina programu (pgid == pid programu); bez riadku pid launcher zlyhal pred fork
+    child = report.read_until("pid")
+    pgid = child[0] if child else proc.pid
+    finished.wait(max(0.0, timeout - (time.perf_counter() - start)))
+    stopped_early = False
+    if waiter.is_alive() and expected and not stdout.missing:
+        # všetky výsledky sú vonku, program dostane chvíľu na normálny koniec
+        waiter.join(max(0.0, min(stop_grace, timeout - (time.perf_counter() - start))))
+        stopped_early = waiter.is_alive()
+    timed_out = waiter.is_alive() and not stopped_early
+    # aj po skončení hlavného procesu môžu v skupine bežať jeho deti
+    kill_group(pgid)
+    # launcher po zabití programu len zapíše status a skončí
+    waiter.join(5)
+    if waiter.is_alive():
+        kill_group(proc.pid)
+        waiter.join()
+    wall_sec = time.perf_counter() - start
+    status = report.read_until("status")
+    exec_error = report.fields.get("exec_error")
+    report.close()
+    deadline = time.monotonic() + 1
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+    # dieťa, ktoré ušlo zo skupiny (setsid), drží rúru otvorenú; čítacie vlákno (daemon)
+    # sa nechá bežať, kým neskončí, a beh sa nahlási ako zlyhanie namiesto čakania
+    escaped = any(reader.is_alive() for reader in readers)
+    if exec_error:
+        raise OSError(exec_error[0], os.strerror(exec_error[0]), cmd[0])
+
+    if status:
+        wait_status, utime_us, stime_us, max_rss_kb = status
+        cpu_sec = (utime_us + stime_us) / 1e6
+    else:
+        # launcher skončil bez statusu (zabitý), ostáva jeho rusage vrátane pamäte gradera
+        wait_status, rusage = waited["status"], waited["rusage"]
+        cpu_sec = rusage.ru_utime + rusage.ru_stime
+        max_rss_kb = rusage.ru_maxrss
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    return RunResult(
+        returncode=proc.returncode,
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        timed_out=timed_out,
+        wall_sec=wall_sec,
+        cpu_sec=cpu_sec,
+        # ru_maxrss je na Linuxe v KiB
+        max_rss_kb=max_rss_kb,
+        protocol="\n".join(stdout.protocol),
+        stopped_early=stopped_early,
+        output_bytes=stdout.total + stderr.total,
+        escaped=escaped,
+    )
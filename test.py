@@ -1,12 +1,34 @@
 import os
-import requests
+import posixpath
 import subprocess
 import importlib
 import csv
-import shutil
+import hashlib
+import itertools
+import json
 import time
 import sys
-from test_helpers import remove_main_from_c
+import threading
+from urllib.parse import urlparse
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import test_helpers
+import sandbox
+from test_helpers import (remove_main_from_c, compile_object, compile_shared_library, link_binary, defined_symbols, build_cached_object,
+                          driver_main_symbol, generate_driver_source, parse_driver_status, generate_vector_harness,
+                          generate_benchmark_harness,
+                          compiler_identity, object_cache_key)
+from result_cache import ResultCache, grading_key, source_fingerprint
+from grading_state import GradingState
+from mirror_store import MirrorStore
+from rate_limit import limiter as rate_limiter, backoff_delay
+from metrics import Metrics
+from project_log import ProjectLog
+from sandbox import Limits, CpuPool, run_limited
+from workspace import WorkspacePool
+from work_queue import parse_shard, shard_of, open_work_queue
+from gitlab_api import (make_session, iter_group_projects, iter_group_projects_recursive, list_repository_tree,
+                        get_raw_file)
 
 # ENV premenné, bezpečné načítanie
 GITLAB_TOKEN = os.environ.get("GITLAB_TOKEN", "")
@@ -14,195 +36,1034 @@ GITLAB_USER = os.environ.get("GITLAB_USER", "")
 GITLAB_GROUP_ID = os.environ.get("GITLAB_GROUP_ID", "")
 ASSIGNMENT = os.environ.get("ASSIGNMENT", "")
 CONTAINER_ID = os.environ.get("CONTAINER_ID") or os.environ.get("GITLAB_GROUP_ID") or str(int(time.time()))
+# batch mód: GITLAB_GROUP_ID aj ASSIGNMENT môžu byť zoznamy oddelené čiarkou,
+# každý repozitár sa stiahne raz a ohodnotí pre všetky zadania
+GROUP_IDS = [group_id.strip() for group_id in GITLAB_GROUP_ID.split(",") if group_id.strip()]
+ASSIGNMENTS = [name.strip() for name in ASSIGNMENT.split(",") if name.strip()]
+BATCH = len(GROUP_IDS) * len(ASSIGNMENTS) > 1
 
-CSV_FILE = f"/results/result_{CONTAINER_ID}.csv"
-LOG_FILE = f"/results/logs_{CONTAINER_ID}.txt"
+# /results je volume kontajnera; prepísateľné kvôli behu mimo Dockeru (bench/bench_e2e.py)
+RESULTS_DIR = os.environ.get("RESULTS_DIR", "/results")
+STUDENTS_DIR = os.environ.get("STUDENTS_DIR", "./students")
 
-sys.stdout = open(LOG_FILE, "a", encoding="utf-8")
-sys.stderr = sys.stdout
+CSV_FILE = f"{RESULTS_DIR}/result_{CONTAINER_ID}.csv"
+LOG_FILE = f"{RESULTS_DIR}/logs_{CONTAINER_ID}.txt"
+# časy fáz (JSON lines) a voliteľný Chrome trace (chrome://tracing, Perfetto)
+METRICS_FILE = f"{RESULTS_DIR}/metrics_{CONTAINER_ID}.jsonl"
+TRACE_FILE = f"{RESULTS_DIR}/trace_{CONTAINER_ID}.json" if os.environ.get("TRACE", "0") == "1" else None
+SLOWEST_REPOS = int(os.environ.get("SLOWEST_REPOS", "10"))
+
+# LOG_LEVEL=INFO vynechá výstupy gcc, gitu a študentských programov; LOG_ARCHIVE=1 = gzip archív s indexom
+LOG = ProjectLog(LOG_FILE, os.environ.get("LOG_LEVEL", "DEBUG"),
+                 archive_path=f"{RESULTS_DIR}/logs_{CONTAINER_ID}.gz" if os.environ.get("LOG_ARCHIVE", "0") == "1" else None,
+                 index_path=f"{RESULTS_DIR}/logs_{CONTAINER_ID}.idx.jsonl")
+sys.stdout = LOG
+sys.stderr = LOG
 
 def print_section(title):
     print(f"\n{'='*16} {title} {'='*16}\n")
 
+METRICS = Metrics(METRICS_FILE)
+
 print_section("LOG STARTED")
 print(f"Started: {time.ctime()}")
 print(f"GITLAB_GROUP_ID={GITLAB_GROUP_ID}, ASSIGNMENT={ASSIGNMENT}")
 
 try:
-    assignment_module = importlib.import_module(f"assignments.{ASSIGNMENT}")
-    TASKS = assignment_module.TASKS
-    print(f"Loaded tasks: {TASKS}")
+    ASSIGNMENT_MODULES = {name: importlib.import_module(f"assignments.{name}") for name in ASSIGNMENTS}
+    for name, module in ASSIGNMENT_MODULES.items():
+        print(f"Loaded tasks of {name}: {module.TASKS}")
 except Exception as e:
-    print(f"Import error: {e}")
+    LOG.error(f"Import error: {e}")
     exit(1)
 
-headers = {"PRIVATE-TOKEN": GITLAB_TOKEN}
-BASE_API = "https://git.kpi.fei.tuke.sk/api/v4"
+BASE_API = os.environ.get("GITLAB_API_URL", "https://git.kpi.fei.tuke.sk/api/v4")
+# ETag cache pre listing projektov, opakovaný beh bez zmien dostane len 304
+GITLAB_CACHE_DIR = os.environ.get("GITLAB_CACHE_DIR", "./.cache/gitlab")
+# 1 = aj projekty všetkých podskupín (napr. 2024/E1_Piatok_7.30/...), DISCOVERY_WORKERS skupín naraz
+RECURSIVE = os.environ.get("RECURSIVE", "0") == "1"
+DISCOVERY_WORKERS = max(1, int(os.environ.get("DISCOVERY_WORKERS", "4")))
 
 COMPILE_TIMEOUT = 15
-TEST_TIMEOUT = 20
+TEST_TIMEOUT = int(os.environ.get("TEST_TIMEOUT", "20"))
+# rlimity študentských binárok, každá beží vo vlastnej skupine procesov; 0 = bez limitu
+RUN_LIMITS = Limits(
+    cpu_sec=int(os.environ.get("RUN_CPU_LIMIT", str(TEST_TIMEOUT))) or None,
+    memory_bytes=int(os.environ.get("RUN_MEMORY_MB", "512")) * 1024 * 1024 or None,
+    max_procs=int(os.environ.get("RUN_MAX_PROCS", "256")) or None,
+    max_file_bytes=int(os.environ.get("RUN_MAX_FILE_MB", "16")) * 1024 * 1024 or None,
+)
+# koľko stdout/stderr študentskej binárky sa uloží do logu, zvyšok sa zahodí
+OUTPUT_LIMIT_BYTES = int(os.environ.get("OUTPUT_LIMIT_KB", "64")) * 1024
+# harness objekty (ps2/main_test_*.c) sú pre všetkých študentov rovnaké
+HARNESS_CACHE_DIR = os.environ.get("HARNESS_CACHE_DIR", "./.cache/harness")
+HARNESS_CFLAGS = []
+# strip = main sa odstráni zo zdrojáku (arrays_nomains.c), objcopy = nezmenený zdroják,
+# main sa v objekte lokalizuje; pri neúspechu sa použije strip
+MAIN_MODE = os.environ.get("MAIN_MODE", "strip")
+STUDENT_OBJECT_CACHE_DIR = os.environ.get("STUDENT_OBJECT_CACHE_DIR", "./.cache/students")
+# 1 = všetky tasky študenta v jednom driveri (jeden link, jedno spustenie)
+SINGLE_DRIVER = os.environ.get("SINGLE_DRIVER", "0") == "1"
+# zadania (oddelené čiarkou), ktoré sa hodnotia podľa TEST_VECTORS z ich modulu namiesto ručne
+# písaných main_test_*.c; zmena zdroja hodnotenia mení body, preto je to vypnuté, kým sa nezapne
+TEST_VECTOR_ASSIGNMENTS = {name.strip() for name in os.environ.get("TEST_VECTORS", "").split(",") if name.strip()}
+# 1 = tasky s TEST_VECTORS (len zadania zapnuté cez TEST_VECTORS) sa volajú cez ctypes zo zdieľanej
+# knižnice (ctypes_runner.py), každá dávka CTYPES_BATCH prípadov vo vlastnom forku; ostatné tasky cez harnessy
+CTYPES_MODE = os.environ.get("CTYPES", "0") == "1"
+CTYPES_BATCH = max(1, int(os.environ.get("CTYPES_BATCH", "64")))
+CTYPES_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ctypes_runner.py")
+# perzistentná cache výsledkov (kľúč: študentský zdroják + harnessy + gcc + timeouty)
+USE_RESULT_CACHE = os.environ.get("RESULT_CACHE", "0") == "1"
+RESULT_CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", "./.cache/results")
+RESULT_CACHE_MAX_MB = int(os.environ.get("RESULT_CACHE_MAX_MB", "256"))
+# clone = celý repozitár, sparse = partial clone len so SUBMISSION_FILES, api = súbory cez REST API,
+# mirror = lokálne bare zrkadlá (MIRROR_DIR) dotiahnuté cez git fetch
+FETCH_MODE = os.environ.get("FETCH_MODE", "clone")
+MIRROR_DIR = os.environ.get("MIRROR_DIR", "./.cache/mirrors")
+MIRROR_MAX_MB = int(os.environ.get("MIRROR_MAX_MB", "10240"))
+# 1 = repozitáre, ktorých HEAD sa od minulého behu nepohol, sa neklonujú
+INCREMENTAL = os.environ.get("INCREMENTAL", "0") == "1"
+STATE_FILE = os.environ.get("STATE_FILE", f"{RESULTS_DIR}/state_{CONTAINER_ID}.json")
+# spoločný limiter pre REST API aj git (požiadavky za sekundu, burst)
+RATE_LIMIT_RPS = float(os.environ.get("RATE_LIMIT_RPS", "10"))
+RATE_LIMIT_BURST = int(os.environ.get("RATE_LIMIT_BURST", "20"))
+rate_limiter.configure(RATE_LIMIT_RPS, RATE_LIMIT_BURST)
+# riadky sa priebežne dopisujú do CSV, hotové projekty sú v checkpointe
+CHECKPOINT_FILE = os.environ.get("CHECKPOINT_FILE", f"{RESULTS_DIR}/checkpoint_{CONTAINER_ID}.json")
+# 1 = pokračovať v prerušenom behu, projekty z checkpointu sa preskočia
+RESUME = os.environ.get("RESUME", "0") == "1"
+# pracovné adresáre projektov na tmpfs (musí byť bez noexec); pri plnom/nepoužiteľnom tmpfs STUDENTS_DIR,
+# v oboch v podadresári workspaces_<CONTAINER_ID>; po ohodnotení sa mažú na pozadí
+# (KEEP_WORKSPACES=1 ich nechá na kontrolu)
+WORKSPACE_DIR = os.environ.get("WORKSPACE_DIR", "/dev/shm/grader")
+WORKSPACE_MAX_MB = int(os.environ.get("WORKSPACE_MAX_MB", "1024"))
+KEEP_WORKSPACES = os.environ.get("KEEP_WORKSPACES", "0") == "1"
+# viac kontajnerov na jednu skupinu: SHARD=i/n hodnotí len projekty, ktorých cesta padne do i-tej
+# z n častí; WORK_QUEUE (súbor *.sqlite alebo adresár) = projekty si kontajnery rozoberajú dynamicky.
+# Výsledky spojí merge_results.py podľa manifestov shard_<CONTAINER_ID>.json.
+SHARD = parse_shard(os.environ.get("SHARD", ""))
+WORK_QUEUE_PATH = os.environ.get("WORK_QUEUE", "")
+WORK_QUEUE_STALE_SEC = int(os.environ.get("WORK_QUEUE_STALE_SEC", "900"))
+# identifikátor behu spoločný pre všetky kontajnery (v GitLab CI predvolene CI_PIPELINE_ID);
+# záznamy fronty z iného behu sa ignorujú
+WORK_QUEUE_RUN = os.environ.get("WORK_QUEUE_RUN") or os.environ.get("CI_PIPELINE_ID", "")
+if WORK_QUEUE_PATH and not os.environ.get("CONTAINER_ID"):
+    # bez neho by mali všetky kontajnery rovnakého vlastníka claimov a hodnotili by to isté
+    LOG.error("WORK_QUEUE requires a unique CONTAINER_ID for every container")
+    exit(1)
+if WORK_QUEUE_PATH and not WORK_QUEUE_RUN:
+    LOG.error("WORK_QUEUE requires WORK_QUEUE_RUN (or CI_PIPELINE_ID) shared by the containers of one run")
+    exit(1)
+MANIFEST_FILE = f"{RESULTS_DIR}/shard_{CONTAINER_ID}.json"
+# počet projektov hodnotených súčasne (1 = sekvenčne)
+WORKERS = max(1, int(os.environ.get("WORKERS", "1")))
 
 def parse_points_from_output(output, task):
+    # harness z testovacích vektorov dáva pomerné body (napr. 0.67)
     for line in output.splitlines():
         if line.startswith(f"TASK:{task}="):
             try:
-                return int(line.split("=")[1])
+                points = float(line.split("=")[1])
             except Exception:
                 return 0
+            return int(points) if points.is_integer() else points
     return 0
 
-def safe_rmtree(path):
-    try:
-        shutil.rmtree(path)
-    except Exception as e:
-        print(f"Could not rmtree {path}: {e}")
-
 def git_clone_with_retries(clone_cmd, max_retries=5, delay_sec=7):
+    # názov ostal z čias, keď sa len klonovalo; slúži pre všetky sieťové git príkazy
     for attempt in range(max_retries):
+        rate_limiter.acquire()
         clone_proc = subprocess.run(clone_cmd, capture_output=True, text=True)
-        print(f"Clone attempt {attempt+1}: stdout: {clone_proc.stdout}")
-        print(f"Clone attempt {attempt+1}: stderr: {clone_proc.stderr}")
+        LOG.debug(f"Clone attempt {attempt+1}: stdout: {clone_proc.stdout}")
+        LOG.debug(f"Clone attempt {attempt+1}: stderr: {clone_proc.stderr}")
         if clone_proc.returncode == 0:
             return True
+        if attempt + 1 == max_retries:
+            break
+        rate_limiter.count("retried")
         if "429" in clone_proc.stderr or "429" in clone_proc.stdout:
-            print(f"Rate limit (429) detected, retrying in {delay_sec} seconds...")
-            time.sleep(delay_sec)
+            # git Retry-After nevidí, tak aspoň exponenciálne s jitterom a pre všetky vlákna
+            rate_limiter.count("throttled")
+            delay = backoff_delay(attempt, base=delay_sec)
+            LOG.warning(f"Rate limit (429) detected, retrying in {delay:.1f} seconds...")
+            rate_limiter.pause(delay)
         else:
-            time.sleep(2)  # menšia pauza aj pri bežných erroroch
+            time.sleep(backoff_delay(attempt, base=2))  # menšia pauza aj pri bežných erroroch
     return False
 
-# --------- JEDNODUCHÁ NE-REKURZÍVNA VERZIA ----------
-def get_group_projects(group_id):
-    group_projects_url = f"{BASE_API}/groups/{group_id}/projects"
-    print_section(f"GET projects for group {group_id}")
-    r = requests.get(group_projects_url, headers=headers)
-    if r.ok:
-        return r.json()
-    print(f"Failed to load projects for group {group_id}: {r.text}")
-    return []
-
-all_projects = get_group_projects(GITLAB_GROUP_ID)
-print(f"Found {len(all_projects)} projects in group {GITLAB_GROUP_ID}.")
-
-csv_header = ["project", "student", "project_path"]
-csv_header.extend([task for task, _ in TASKS])
-csv_header.append("total")
-csv_rows = [csv_header]
-
-for idx, project in enumerate(all_projects, 1):
-    print_section(f"Processing project {idx}/{len(all_projects)}: {project.get('path', '')}")
+def build_object_or_exit(source_path, cflags, label):
     try:
-        if not isinstance(project, dict) or 'path' not in project:
-            print(f"{project}: not a valid dict with 'path'")
-            continue
+        object_path, gcc_proc = build_cached_object(
+            source_path, HARNESS_CACHE_DIR, cflags, timeout=COMPILE_TIMEOUT)
+    except Exception as e:
+        LOG.error(f"{label}: compile exception: {e}")
+        exit(1)
+    if object_path is None:
+        LOG.error(f"{label} does not compile:\n{gcc_proc.stderr}")
+        exit(1)
+    print(f"{label}: {object_path}{' (cached)' if gcc_proc is None else ''}")
+    return object_path
 
-        repo_name = project['path']
-        student_name = project.get("name", "")
-        project_path = project.get("path_with_namespace", "")
+def build_harness_objects(tasks):
+    # každý harness sa skompiluje raz pri štarte; pokazený harness = koniec behu
+    return {
+        task: build_object_or_exit(os.path.abspath(main_c), HARNESS_CFLAGS, f"Harness {main_c} for task {task}")
+        for task, main_c in tasks
+    }
 
-        repo_url = project['http_url_to_repo']
-        if repo_url.startswith("https://"):
-            repo_url = repo_url.replace("https://", f"https://{GITLAB_USER}:{GITLAB_TOKEN}@")
-        target_dir = f"./students/{repo_name}"
-        safe_rmtree(target_dir)
-        os.makedirs(target_dir, exist_ok=True)
+def build_driver_objects(tasks, task_symbols):
+    # harnessy s main premenovaným na harness_main_<task> + vygenerovaný driver
+    object_paths = [
+        build_object_or_exit(os.path.abspath(main_c), HARNESS_CFLAGS + [f"-Dmain={driver_main_symbol(task)}"],
+                             f"Driver harness {main_c} for task {task}")
+        for task, main_c in tasks
+    ]
+    task_names = [task for task, _ in tasks]
+    driver_source = generate_driver_source(
+        task_names, [task_symbols.get(task, task) for task in task_names], TEST_TIMEOUT)
+    driver_c_path = write_generated_source("driver", driver_source)
+    object_paths.insert(0, build_object_or_exit(driver_c_path, HARNESS_CFLAGS, "Driver"))
+    return object_paths
+
+def write_generated_source(prefix, source):
+    # meno podľa obsahu, aby sa objekt v HARNESS_CACHE_DIR dal použiť znova
+    os.makedirs(HARNESS_CACHE_DIR, exist_ok=True)
+    c_path = os.path.join(HARNESS_CACHE_DIR, f"{prefix}_{hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]}.c")
+    if not os.path.exists(c_path):
+        tmp_path = f"{c_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        os.replace(tmp_path, c_path)
+    return c_path
+
+# študentské programy sa spúšťajú cez malý launcher v C (sandbox.LAUNCHER_SOURCE), skompiluje sa raz
+try:
+    print(f"Sandbox launcher: {sandbox.build_launcher(HARNESS_CACHE_DIR)}")
+except Exception as e:
+    LOG.error(f"Sandbox launcher: {e}")
+    exit(1)
+
+# spoločná časť kľúča hodnotenia pre všetky zadania
+# (test_helpers.py obsahuje odstraňovanie main, jeho zmena mení výsledky)
+COMMON_GRADING_KEY = (
+    source_fingerprint(test_helpers.__file__), source_fingerprint(sandbox.__file__), compiler_identity(),
+    COMPILE_TIMEOUT, TEST_TIMEOUT, RUN_LIMITS.key(), f"main={MAIN_MODE}",
+    "single-driver" if SINGLE_DRIVER else "per-task",
+    f"ctypes={source_fingerprint(CTYPES_RUNNER)}:{CTYPES_BATCH}" if CTYPES_MODE else "harness",
+)
+
+class Assignment:
+    """Zadanie (assignments/<name>.py) s harnessmi postavenými raz pre všetky skupiny."""
+
+    def __init__(self, name, module):
+        self.name = name
+        # task -> meno C funkcie, ktorú musí študent definovať (predvolene rovnaké ako task)
+        self.task_symbols = dict(getattr(module, "TASK_SYMBOLS", {}))
+        # task s TEST_VECTORS dostane vygenerovaný harness namiesto ručne písaného main_test_*.c,
+        # len ak je zadanie v TEST_VECTORS
+        test_vectors = getattr(module, "TEST_VECTORS", {}) if name in TEST_VECTOR_ASSIGNMENTS else {}
+        # v CTYPES móde sa tieto tasky volajú cez ctypes; harness ostáva ako záloha, keď sa .so nepostaví
+        self.vector_specs = test_vectors if CTYPES_MODE else {}
+        # task z BENCHMARKS dostane navyše stĺpec <task>_perf s bodmi za rýchlosť oproti referencii
+        benchmarks = getattr(module, "BENCHMARKS", {})
+        self.perf_tasks = set()
+        self.tasks = []
+        for task, main_c in module.TASKS:
+            if task in test_vectors:
+                source = generate_vector_harness(task, self.symbol(task), test_vectors[task])
+                main_c = write_generated_source(f"vectors_{task}", source)
+                print(f"Task {task}: {len(test_vectors[task]['cases'])} test vectors -> {main_c}")
+            self.tasks.append((task, main_c))
+            if task in benchmarks:
+                perf_task = f"{task}_perf"
+                self.task_symbols[perf_task] = self.symbol(task)
+                source = generate_benchmark_harness(perf_task, self.symbol(task), benchmarks[task])
+                perf_c = write_generated_source(f"benchmark_{task}", source)
+                print(f"Task {perf_task}: {len(benchmarks[task]['inputs'])} benchmark inputs -> {perf_c}")
+                self.tasks.append((perf_task, perf_c))
+                self.perf_tasks.add(perf_task)
+        # súbory z repozitára, ktoré sa hodnotia; prvý je C zdroják so študentskými funkciami
+        self.submission_files = getattr(module, "SUBMISSION_FILES", ["ps2/arrays.c"])
+        if SINGLE_DRIVER:
+            self.driver_objects = build_driver_objects(self.tasks, self.task_symbols)
+        else:
+            self.harness_objects = build_harness_objects(self.tasks)
+        # všetko okrem študentského zdrojáku, od čoho závisí výsledok hodnotenia
+        harness_keys = [f"{task}:{self.symbol(task)}:{object_cache_key(os.path.abspath(main_c), HARNESS_CFLAGS)}"
+                        for task, main_c in self.tasks]
+        if SINGLE_DRIVER:
+            # objekty driveru sú pomenované podľa kľúča (harness s -Dmain=, vygenerovaný driver)
+            harness_keys += [os.path.basename(path) for path in self.driver_objects]
+        self.fingerprint = grading_key(*COMMON_GRADING_KEY, *harness_keys)
+        self.result_cache = None
+        if USE_RESULT_CACHE:
+            self.result_cache = ResultCache(RESULT_CACHE_DIR, name, RESULT_CACHE_MAX_MB * 1024 * 1024)
+            print(f"Result cache: {RESULT_CACHE_DIR}/{name}")
+
+    def symbol(self, task):
+        return self.task_symbols.get(task, task)
+
+    def failed_tail(self, label):
+        return [label] * len(self.tasks) + ["0"]
+
+print_section("BUILDING HARNESSES")
+ASSIGNMENT_RUNS = [Assignment(name, module) for name, module in ASSIGNMENT_MODULES.items()]
+
+# benchmarky (<task>_perf) bežia pripnuté na BENCH_CPUS (predvolene posledné CPU), každé CPU naraz
+# len jeden; grader a jeho ostatné procesy sa z nich odsunú, aby meranie nerušila paralelná práca
+BENCH_POOL = None
+if any(assignment.perf_tasks for assignment in ASSIGNMENT_RUNS):
+    available = os.sched_getaffinity(0)
+    bench_cpus = [int(cpu) for cpu in os.environ.get("BENCH_CPUS", str(max(available))).split(",") if cpu.strip()]
+    bench_cpus = [cpu for cpu in bench_cpus if cpu in available]
+    other_cpus = available - set(bench_cpus)
+    if bench_cpus and other_cpus:
+        # ešte pred štartom vlákien, tie masku zdedia
+        os.sched_setaffinity(0, other_cpus)
+    else:
+        print("Not enough CPUs to reserve for benchmarks, timing shares CPUs with grading")
+    BENCH_POOL = CpuPool(bench_cpus or [None])
+    print(f"Benchmark CPUs: {bench_cpus or 'unpinned'}, grader CPUs: {sorted(other_cpus) or sorted(available)}")
+
+@contextmanager
+def bench_cpu(needed):
+    """Vyhradené CPU pre beh s benchmarkom (množina pre run_limited), inak None bez čakania."""
+    if not needed or BENCH_POOL is None:
+        yield None
+        return
+    with BENCH_POOL.pinned() as cpus:
+        yield cpus
+
+def run_driver(assignment, repo_name, build_dir, arrays_obj_path, tasks):
+    """Zlinkuje a spustí driver pre zoznam taskov; vracia task -> (body, chyba)."""
+    if not tasks:
+        return {}
+    output_bin_path = os.path.join(build_dir, "driver_tester.out")
+    try:
+        print(f"Linking driver: {arrays_obj_path}")
+        with METRICS.phase(repo_name, "link", task="driver"):
+            gcc_proc = link_binary(assignment.driver_objects + [arrays_obj_path], output_bin_path,
+                                   timeout=COMPILE_TIMEOUT)
+        LOG.debug(f"GCC stdout: {gcc_proc.stdout}")
+        LOG.debug(f"GCC stderr: {gcc_proc.stderr}")
+        if gcc_proc.returncode != 0:
+            return {task: (0, "compile error") for task in tasks}
+    except subprocess.TimeoutExpired:
+        return {task: (0, "compile timeout") for task in tasks}
+    except Exception as e:
+        return {task: (0, f"compile exception: {e}") for task in tasks}
+
+    try:
+        print(f"Running driver for tasks {tasks}: {output_bin_path}")
+        # každý task má vlastný alarm v driveri, toto je len poistka navyše
+        # s benchmarkom beží celý driver pripnutý na vyhradenom CPU
+        with bench_cpu(assignment.perf_tasks.intersection(tasks)) as cpus, \
+                METRICS.phase(repo_name, "run", task="driver") as usage:
+            run_proc = run_limited([output_bin_path, *tasks], TEST_TIMEOUT * len(tasks) + 5, RUN_LIMITS,
+                                   max_output_bytes=OUTPUT_LIMIT_BYTES, protocol_prefixes=("TASK:", "STATUS:"),
+                                   expected=[f"STATUS:{task}=" for task in tasks], cpus=cpus)
+            usage.update(run_proc.usage())
+        LOG.debug(f"Run stdout: {run_proc.stdout}")
+        LOG.debug(f"Run stderr: {run_proc.stderr}")
+        LOG.debug(f"Run usage: {run_proc.usage()}{' (timeout)' if run_proc.timed_out else ''}")
+        # aj po timeoute sa použijú STATUS riadky taskov, ktoré stihli dobehnúť
+        output = run_proc.protocol
+    except Exception as e:
+        return {task: (0, f"run exception: {e}") for task in tasks}
+    if run_proc.escaped:
+        print(f"{repo_name}: driver left a process outside its group holding the output open")
+        return {task: (0, "sandbox escape") for task in tasks}
+
+    statuses = parse_driver_status(output)
+    results = {}
+    for task in tasks:
+        status = statuses.get(task, "timeout")
+        if status == "exit:0":
+            results[task] = (parse_points_from_output(output, task), None)
+        elif status.startswith("exit:"):
+            results[task] = (0, f"run fail code {status[len('exit:'):]}")
+        elif status.startswith("signal:"):
+            results[task] = (0, f"run fail code -{status[len('signal:'):]}")
+        else:
+            results[task] = (0, status)
+    return results
+
+def run_ctypes(assignment, repo_name, build_dir, source_path, tasks):
+    """Postaví zdieľanú knižnicu a otestuje tasky cez ctypes_runner.py; vracia task -> (body, chyba).
+
+    Pri chybe kompilácie .so vracia None a tasky sa otestujú harnessmi.
+    Body môžu byť nenulové aj s chybou (spadla len časť dávok).
+    """
+    if not tasks:
+        return {}
+    library_path = os.path.join(build_dir, "libstudent.so")
+    try:
+        print(f"Building shared library: {source_path} -> {library_path}")
+        with METRICS.phase(repo_name, "link", task="ctypes"):
+            gcc_proc = compile_shared_library(source_path, library_path, timeout=COMPILE_TIMEOUT)
+        LOG.debug(f"GCC stdout: {gcc_proc.stdout}")
+        LOG.debug(f"GCC stderr: {gcc_proc.stderr}")
+        if gcc_proc.returncode != 0:
+            print(f"{repo_name}: shared library does not build, falling back to harnesses")
+            return None
+    except Exception as e:
+        print(f"{repo_name}: shared library build failed ({e}), falling back to harnesses")
+        return None
+
+    job_path = os.path.join(build_dir, "ctypes_job.json")
+    with open(job_path, "w", encoding="utf-8") as f:
+        json.dump({"timeout": TEST_TIMEOUT, "batch_size": CTYPES_BATCH,
+                   "tasks": [{"task": task, "symbol": assignment.symbol(task), "spec": assignment.vector_specs[task]}
+                             for task in tasks]}, f)
+    try:
+        print(f"Running ctypes tests for tasks {tasks}: {library_path}")
+        # alarm má každá dávka vo forku, toto je len poistka navyše
+        batches = sum(-(-len(assignment.vector_specs[task]["cases"]) // CTYPES_BATCH) for task in tasks)
+        with METRICS.phase(repo_name, "run", task="ctypes") as usage:
+            run_proc = run_limited([sys.executable, CTYPES_RUNNER, library_path, job_path],
+                                   TEST_TIMEOUT * batches + 5, RUN_LIMITS, max_output_bytes=OUTPUT_LIMIT_BYTES,
+                                   protocol_prefixes=("TASK:", "CASES:", "STATUS:", "LOAD_FAILED:"),
+                                   expected=[f"STATUS:{task}=" for task in tasks])
+            usage.update(run_proc.usage())
+        LOG.debug(f"Run stdout: {run_proc.stdout}")
+        LOG.debug(f"Run stderr: {run_proc.stderr}")
+        LOG.debug(f"Run usage: {run_proc.usage()}{' (timeout)' if run_proc.timed_out else ''}")
+        output = run_proc.protocol
+    except Exception as e:
+        return {task: (0, f"run exception: {e}") for task in tasks}
+    if run_proc.escaped:
+        print(f"{repo_name}: ctypes run left a process outside its group holding the output open")
+        return {task: (0, "sandbox escape") for task in tasks}
+
+    for line in output.splitlines():
+        if line.startswith(("CASES:", "LOAD_FAILED:")):
+            print(line)
+    statuses = parse_driver_status(output)
+    results = {}
+    for task in tasks:
+        status = statuses.get(task, "timeout")
+        pt = parse_points_from_output(output, task) if task in statuses else 0
+        if status == "exit:0":
+            results[task] = (pt, None)
+        elif status.startswith("exit:"):
+            results[task] = (pt, f"run fail code {status[len('exit:'):]}")
+        elif status.startswith("signal:"):
+            results[task] = (pt, f"run fail code -{status[len('signal:'):]}")
+        else:
+            results[task] = (pt, status)
+    return results
+
+
+def remote_head_sha(repo_url, branch=None):
+    ref = f"refs/heads/{branch}" if branch else "HEAD"
+    rate_limiter.acquire()
+    try:
+        proc = subprocess.run(["git", "ls-remote", repo_url, ref], capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        return None
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return None
+    return proc.stdout.split()[0]
+
+def local_head_sha(repo_dir):
+    proc = subprocess.run(["git", "-C", repo_dir, "rev-parse", "HEAD"], capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+def reuse_previous_result(state, state_key, fingerprint, project, repo_url, remote_shas):
+    """Stĺpce z minulého behu, ak sa HEAD repozitára odvtedy nezmenil, inak None.
 
+    Rozhoduje vždy SHA z ls-remote; last_activity_at GitLab aktualizuje len
+    približne raz za hodinu, push tesne pred termínom by ho nezmenil.
+    remote_shas je cache ls-remote pre projekt, aby sa pri viacerých zadaniach volal raz.
+    """
+    previous = state.get(state_key)
+    if not previous or previous.get("grading") != fingerprint or "tail" not in previous:
+        return None
+    activity = project.get("last_activity_at")
+    if "sha" not in remote_shas:
+        remote_shas["sha"] = remote_head_sha(repo_url, project.get("default_branch"))
+    sha = remote_shas["sha"]
+    if sha and sha == previous.get("sha"):
+        print(f"Remote HEAD {sha} already graded, reusing result")
+        state.update(state_key, last_activity_at=activity)
+        return previous["tail"]
+    return None
+
+def fetch_files_via_api(project, target_dir, files):
+    ref = project.get("default_branch")
+    if not ref:
+        print("Empty repository, no default branch")
+        return False, [], None
+    try:
+        present = set()
+        for directory in sorted({posixpath.dirname(path) for path in files}):
+            present.update(item["path"] for item in list_repository_tree(session, BASE_API, project["id"], directory, ref)
+                           if item.get("type") == "blob")
+        missing = [path for path in files if path not in present]
+        if missing == files:
+            return True, missing, None
+        head_sha = None
+        for path in files:
+            if path in missing:
+                continue
+            content, commit_id = get_raw_file(session, BASE_API, project["id"], path, ref)
+            print(f"Fetched {path} ({len(content)} bytes) at {commit_id}")
+            local_path = os.path.join(target_dir, *path.split("/"))
+            os.makedirs(os.path.dirname(local_path), exist_ok=True)
+            with open(local_path, "wb") as f:
+                f.write(content)
+            head_sha = head_sha or commit_id
+        return True, missing, head_sha
+    except Exception as e:
+        print(f"API fetch failed: {e}")
+        return False, [], None
+
+def fetch_submission(group_id, project, repo_url, target_dir, files):
+    """Stiahne do target_dir repozitár, resp. len súbory files (podľa FETCH_MODE).
+
+    Vracia (ok, zoznam chýbajúcich súborov, SHA stiahnutého commitu).
+    """
+    if FETCH_MODE == "api":
+        return fetch_files_via_api(project, target_dir, files)
+
+    if FETCH_MODE == "mirror":
+        mirror_key = project_mirror_key(group_id, project)
+        print(f"Updating mirror {MIRRORS.mirror_path(mirror_key)}")
+        if not MIRRORS.update(mirror_key, repo_url):
+            return False, [], None
+        present = MIRRORS.list_files(mirror_key, files)
+        missing = [path for path in files if path not in present]
+        if present:
+            MIRRORS.export(mirror_key, target_dir, [path for path in files if path in present])
+        return True, missing, MIRRORS.head_sha(mirror_key)
+
+    if FETCH_MODE == "sparse":
+        # bez blobov, tie sa stiahnu až pri checkoute a len pre files
+        clone_cmd = ["git", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", repo_url, target_dir]
+    else:
         clone_cmd = ["git", "clone", "--depth", "1", repo_url, target_dir]
-        print(f"Running clone: {' '.join(clone_cmd)}")
-        cloned_ok = git_clone_with_retries(clone_cmd, max_retries=7, delay_sec=7)
-        if not cloned_ok:
-            print(f"{repo_name}: NOT SUBMITTED, git clone failed")
-            csv_rows.append([repo_name, student_name, project_path] + ["git_clone_failed"]*len(TASKS) + ["0"])
-            continue
+    print(f"Running clone: {' '.join(clone_cmd)}")
+    if not git_clone_with_retries(clone_cmd, max_retries=7, delay_sec=7):
+        return False, [], None
 
-        arrays_c_path = os.path.join(target_dir, "ps2", "arrays.c")
-        if not os.path.exists(arrays_c_path):
-            print(f"{repo_name}: ps2/arrays.c NOT FOUND")
-            csv_rows.append([repo_name, student_name, project_path] + ["arrays.c_missing"]*len(TASKS) + ["0"])
-            continue
+    if FETCH_MODE == "sparse":
+        ls_proc = subprocess.run(["git", "-C", target_dir, "ls-tree", "-r", "--name-only", "HEAD", "--", *files],
+                                 capture_output=True, text=True)
+        present = set(ls_proc.stdout.splitlines())
+        missing = [path for path in files if path not in present]
+        if missing == files:
+            return True, missing, local_head_sha(target_dir)
+        subprocess.run(["git", "-C", target_dir, "sparse-checkout", "set", "--no-cone",
+                        *[path for path in files if path in present]], capture_output=True, text=True)
+        if not git_clone_with_retries(["git", "-C", target_dir, "checkout"], max_retries=7, delay_sec=7):
+            return False, [], None
+
+    missing = [path for path in files if not os.path.exists(os.path.join(target_dir, path))]
+    return True, missing, local_head_sha(target_dir)
+
+try:
+    # vlastné podadresáre workspaces_<CONTAINER_ID>, iný obsah WORKSPACE_DIR a STUDENTS_DIR ostane
+    WORKSPACES = WorkspacePool(WORKSPACE_DIR or None, STUDENTS_DIR, WORKSPACE_MAX_MB * 1024 * 1024,
+                               CONTAINER_ID, keep=KEEP_WORKSPACES)
+except (OSError, ValueError) as e:
+    LOG.error(f"Workspaces: {e}")
+    exit(1)
+print(f"Workspaces: {WORKSPACES.root or WORKSPACES.spill_root}")
+
+MIRRORS = None
+# zrkadlá všetkých nájdených projektov (aj z iných shardov, aj tých, ktoré sa teraz nehodnotia), GC ich nechá
+seen_mirror_keys = set()
+# MIRROR_DIR môžu zdieľať behy pre rôzne skupiny aj servery, GC maže len v skupinách tohto behu
+MIRROR_NAMESPACE = urlparse(BASE_API).hostname or "gitlab"
+
+def project_mirror_key(group_id, project):
+    return f"{MIRROR_NAMESPACE}/{group_id}/{project.get('id', project.get('path'))}"
+if FETCH_MODE == "mirror":
+    MIRRORS = MirrorStore(MIRROR_DIR, MIRROR_MAX_MB * 1024 * 1024,
+                          lambda cmd: git_clone_with_retries(cmd, max_retries=7, delay_sec=7))
+
+def pair_path(path, group_id, assignment_name):
+    # jeden pár skupina/zadanie = pôvodné mená súborov, v batch móde s príponou páru
+    if not BATCH:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{group_id}_{assignment_name}{ext}"
+
+class GradingOutput:
+    """CSV, checkpoint a inkrementálny stav jedného páru skupina/zadanie."""
 
-        arrays_nomains_path = os.path.join(target_dir, "ps2", "arrays_nomains.c")
+    def __init__(self, group_id, assignment):
+        self.group_id = group_id
+        self.assignment = assignment
+        self.csv_file = pair_path(CSV_FILE, group_id, assignment.name)
+        self.header = ["project", "student", "project_path"] + [task for task, _ in assignment.tasks] + ["total"]
+        # riadky vo finálnom poradí projektov, doplnia sa po dohodnotení
+        self.rows = []
+        # projekty tohto kontajnera bez výsledku (výnimka), checkpoint sa pre ne nechá
+        self.unfinished = 0
+        self._lock = threading.Lock()
+
+        checkpoint_file = pair_path(CHECKPOINT_FILE, group_id, assignment.name)
+        if not RESUME and os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+        self.checkpoint = GradingState(checkpoint_file)
+        if RESUME:
+            print(f"Resuming from {checkpoint_file} ({len(self.checkpoint.projects)} projects done)")
+
+        self.state = None
+        if INCREMENTAL:
+            state_file = pair_path(STATE_FILE, group_id, assignment.name)
+            self.state = GradingState(state_file)
+            print(f"Incremental state: {state_file} ({len(self.state.projects)} projects)")
+
+        if not RESUME or not os.path.exists(self.csv_file):
+            with open(self.csv_file, "w", encoding="utf-8", newline='') as f:
+                csv.writer(f).writerow(self.header)
+
+    def append_row(self, row):
+        # riadok musí byť na disku skôr, ako sa projekt zapíše do checkpointu
+        with self._lock:
+            with open(self.csv_file, "a", encoding="utf-8", newline='') as f:
+                csv.writer(f).writerow(row)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def mark_unfinished(self):
+        with self._lock:
+            self.unfinished += 1
+
+    def write_final(self, listing_complete):
+        # priebežný CSV je v poradí dokončenia, finálny sa prepíše v poradí projektov
+        tmp_csv_file = f"{self.csv_file}.tmp"
+        with open(tmp_csv_file, "w", encoding="utf-8", newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.header)
+            for row in self.rows:
+                writer.writerow(row)
+        os.replace(tmp_csv_file, self.csv_file)
+        # checkpoint sa zmaže, len ak má každý nájdený projekt výsledok; inak ho RESUME=1 dokončí
+        if not listing_complete or self.unfinished:
+            print(f"Checkpoint kept: {self.checkpoint.path} ({self.unfinished} projects without result"
+                  f"{', project listing incomplete' if not listing_complete else ''})")
+        elif os.path.exists(self.checkpoint.path):
+            os.remove(self.checkpoint.path)
+
+OUTPUTS = {(group_id, assignment.name): GradingOutput(group_id, assignment)
+           for group_id in GROUP_IDS for assignment in ASSIGNMENT_RUNS}
+
+WORK_QUEUE = open_work_queue(WORK_QUEUE_PATH, CONTAINER_ID, WORK_QUEUE_STALE_SEC, WORK_QUEUE_RUN) if WORK_QUEUE_PATH else None
+# všetky nájdené projekty (aj z iných shardov) pre manifest: skupina -> [{path, path_with_namespace}]
+DISCOVERED = {group_id: [] for group_id in GROUP_IDS}
+# chyby pri zisťovaní projektov; neprázdny zoznam = výsledky nie sú úplné (beh skončí s kódom 1)
+LISTING_ERRORS = []
+if SHARD:
+    print(f"Shard {SHARD[0]}/{SHARD[1]}")
+if WORK_QUEUE is not None:
+    print(f"Work queue: {WORK_QUEUE_PATH} (run {WORK_QUEUE_RUN})")
+
+def project_label(project):
+    return project.get("path_with_namespace") or project.get("path") if isinstance(project, dict) else None
+
+def iter_all_projects():
+    # projekty sa streamujú, hodnotenie začína ešte počas stránkovania
+    for group_id in GROUP_IDS:
+        print(f"Listing projects of group {group_id}")
+        if RECURSIVE:
+            projects = iter_group_projects_recursive(session, BASE_API, group_id, max_workers=DISCOVERY_WORKERS,
+                                                     cache_dir=GITLAB_CACHE_DIR, errors=LISTING_ERRORS)
+        else:
+            projects = iter_group_projects(session, BASE_API, group_id, cache_dir=GITLAB_CACHE_DIR,
+                                           errors=LISTING_ERRORS)
+        for project in projects:
+            if isinstance(project, dict):
+                seen_mirror_keys.add(project_mirror_key(group_id, project))
+            label = project_label(project)
+            if label:
+                DISCOVERED[group_id].append({"path": project.get("path"), "path_with_namespace": label})
+            if SHARD and label and shard_of(label, SHARD[1]) != SHARD[0]:
+                continue
+            yield group_id, project
+
+print_section(f"GET projects for group {GITLAB_GROUP_ID}")
+session = make_session(GITLAB_TOKEN)
+all_projects = METRICS.timed_iter(iter_all_projects(), "*", "discovery")
+
+def project_key(project):
+    if not isinstance(project, dict):
+        return None
+    return str(project.get("id", project.get("path_with_namespace") or project.get("path")))
+
+def build_student_object_objcopy(arrays_c_path):
+    """Objekt z nezmeneného arrays.c s lokálnym main (cache podľa hashu zdrojáku), alebo None."""
+    try:
+        print(f"Compiling unchanged student source with local main: {arrays_c_path}")
+        object_path, proc = build_cached_object(arrays_c_path, STUDENT_OBJECT_CACHE_DIR, timeout=COMPILE_TIMEOUT,
+                                                objcopy_args=["--localize-symbol=main"])
+    except Exception as e:
+        print(f"Object-level main neutralization failed ({e}), falling back to remove_main_from_c")
+        return None
+    if object_path is None:
+        print(f"Object-level main neutralization failed:\n{proc.stderr}\nFalling back to remove_main_from_c")
+        return None
+    print(f"Student object: {object_path}{' (cached)' if proc is None else ''}")
+    return object_path
+
+def grade_submission(assignment, repo_name, project_path, arrays_c_path):
+    """Ohodnotí arrays.c pre zadanie; vracia (stĺpce s bodmi + total, zoznam chýb)."""
+    build_dir = os.path.dirname(arrays_c_path)
+    arrays_obj_path = None
+    if MAIN_MODE == "objcopy":
+        with METRICS.phase(repo_name, "compile"):
+            arrays_obj_path = build_student_object_objcopy(arrays_c_path)
+
+    student_error = None
+    student_symbols = set()
+    # zdroják pre zdieľanú knižnicu v CTYPES móde (main v .so nevadí, nikto ho nevolá)
+    library_source = arrays_c_path
+    if arrays_obj_path is not None:
+        student_symbols = defined_symbols(arrays_obj_path)
+        print(f"Defined symbols: {sorted(student_symbols)}")
+    else:
+        arrays_nomains_path = os.path.splitext(arrays_c_path)[0] + "_nomains.c"
         try:
             print(f"Calling remove_main_from_c: {arrays_c_path} -> {arrays_nomains_path}")
-            remove_main_from_c(arrays_c_path, arrays_nomains_path)
+            with METRICS.phase(repo_name, "strip"):
+                remove_main_from_c(arrays_c_path, arrays_nomains_path)
         except Exception as e:
             print(f"{repo_name}: remove_main_from_c failed: {e}")
-            csv_rows.append([repo_name, student_name, project_path] + ["remove_main_failed"]*len(TASKS) + ["0"])
+            return assignment.failed_tail("remove_main_failed"), [f"remove_main_from_c failed: {e}"]
+        library_source = arrays_nomains_path
+
+        # študentský kód sa kompiluje iba raz, pre tasky sa už len linkuje
+        arrays_obj_path = os.path.splitext(arrays_c_path)[0] + "_nomains.o"
+        try:
+            print(f"Compiling student object: {arrays_nomains_path} -> {arrays_obj_path}")
+            with METRICS.phase(repo_name, "compile"):
+                gcc_proc = compile_object(arrays_nomains_path, arrays_obj_path, timeout=COMPILE_TIMEOUT)
+            LOG.debug(f"GCC stdout: {gcc_proc.stdout}")
+            LOG.debug(f"GCC stderr: {gcc_proc.stderr}")
+            if gcc_proc.returncode != 0:
+                student_error = "compile error"
+            else:
+                student_symbols = defined_symbols(arrays_obj_path)
+                print(f"Defined symbols: {sorted(student_symbols)}")
+        except subprocess.TimeoutExpired:
+            student_error = "compile timeout"
+        except Exception as e:
+            student_error = f"compile exception: {e}"
+
+    ctypes_results = {}
+    if assignment.vector_specs and not student_error:
+        ctypes_results = run_ctypes(assignment, repo_name, build_dir, library_source, [
+            task for task in assignment.vector_specs if assignment.symbol(task) in student_symbols]) or {}
+
+    driver_results = {}
+    if SINGLE_DRIVER and not student_error:
+        driver_results = run_driver(assignment, repo_name, build_dir, arrays_obj_path, [
+            task for task, _ in assignment.tasks
+            if assignment.symbol(task) in student_symbols and task not in ctypes_results])
+
+    row_points = []
+    total = 0
+    successful = False
+    task_errors = []
+    for task, _ in assignment.tasks:
+        if student_error:
+            print(f"{repo_name}: {task}: {student_error}")
+            task_errors.append(f"{task}: {student_error}")
+            row_points.append(0)
+            continue
+        symbol = assignment.symbol(task)
+        if symbol not in student_symbols:
+            print(f"{repo_name}: {task}: missing symbol {symbol}")
+            task_errors.append(f"{task}: missing symbol {symbol}")
+            row_points.append(0)
             continue
 
-        row_points = []
-        total = 0
-        successful = False
-        task_errors = []
-        for task, main_c in TASKS:
-            main_test_c_path = os.path.abspath(main_c)
-            output_bin_path = os.path.join(target_dir, "ps2", f"{task}_tester.out")
-            try:
-                print(f"Compiling for task {task}: {main_test_c_path} + {arrays_nomains_path}")
-                gcc_proc = subprocess.run(
-                    ["gcc", main_test_c_path, arrays_nomains_path, "-o", output_bin_path, "-lm"],
-                    capture_output=True, text=True, timeout=COMPILE_TIMEOUT)
-                print(f"GCC stdout: {gcc_proc.stdout}")
-                print(f"GCC stderr: {gcc_proc.stderr}")
-                if gcc_proc.returncode != 0:
-                    print(f"{repo_name}: {task}: compile error")
-                    task_errors.append(f"{task}: compile error")
-                    row_points.append(0)
-                    continue
-            except subprocess.TimeoutExpired:
-                print(f"{repo_name}: {task}: compile timeout")
-                task_errors.append(f"{task}: compile timeout")
+        if task in ctypes_results:
+            pt, error = ctypes_results[task]
+            if error:
+                print(f"{repo_name}: {task}: {error}")
+                task_errors.append(f"{task}: {error}")
+            print(f"Points parsed for {task}: {pt}")
+            row_points.append(pt)
+            total += pt
+            # časť dávok mohla spadnúť, body za prejdené prípady ostávajú
+            successful = successful or pt > 0 or not error
+            continue
+
+        if SINGLE_DRIVER:
+            pt, error = driver_results[task]
+            if error:
+                print(f"{repo_name}: {task}: {error}")
+                task_errors.append(f"{task}: {error}")
                 row_points.append(0)
-                continue
-            except Exception as e:
-                print(f"{repo_name}: {task}: compile exception: {e}")
-                task_errors.append(f"{task}: compile exception: {e}")
+            else:
+                print(f"Points parsed for {task}: {pt}")
+                row_points.append(pt)
+                total += pt
+                successful = True
+            continue
+
+        harness_obj_path = assignment.harness_objects[task]
+        output_bin_path = os.path.join(build_dir, f"{task}_tester.out")
+        try:
+            print(f"Linking for task {task}: {harness_obj_path} + {arrays_obj_path}")
+            with METRICS.phase(repo_name, "link", task=task):
+                gcc_proc = link_binary([harness_obj_path, arrays_obj_path], output_bin_path, timeout=COMPILE_TIMEOUT)
+            LOG.debug(f"GCC stdout: {gcc_proc.stdout}")
+            LOG.debug(f"GCC stderr: {gcc_proc.stderr}")
+            if gcc_proc.returncode != 0:
+                print(f"{repo_name}: {task}: compile error")
+                task_errors.append(f"{task}: compile error")
                 row_points.append(0)
                 continue
+        except subprocess.TimeoutExpired:
+            print(f"{repo_name}: {task}: compile timeout")
+            task_errors.append(f"{task}: compile timeout")
+            row_points.append(0)
+            continue
+        except Exception as e:
+            print(f"{repo_name}: {task}: compile exception: {e}")
+            task_errors.append(f"{task}: compile exception: {e}")
+            row_points.append(0)
+            continue
 
-            try:
-                print(f"Running binary for task {task}: {output_bin_path}")
-                run_proc = subprocess.run([output_bin_path], capture_output=True, text=True, timeout=TEST_TIMEOUT)
-                print(f"Run stdout: {run_proc.stdout}")
-                print(f"Run stderr: {run_proc.stderr}")
-                if run_proc.returncode == 0:
-                    pt = parse_points_from_output(run_proc.stdout, task)
-                    print(f"Points parsed: {pt}")
-                    row_points.append(pt)
-                    total += pt
-                    successful = True
-                else:
-                    print(f"{repo_name}: {task}: run fail code {run_proc.returncode}")
-                    task_errors.append(f"{task}: run fail code {run_proc.returncode}")
-                    row_points.append(0)
-            except subprocess.TimeoutExpired:
+        try:
+            print(f"Running binary for task {task}: {output_bin_path}")
+            with bench_cpu(task in assignment.perf_tasks) as cpus, \
+                    METRICS.phase(repo_name, "run", task=task) as usage:
+                run_proc = run_limited([output_bin_path], TEST_TIMEOUT, RUN_LIMITS,
+                                       max_output_bytes=OUTPUT_LIMIT_BYTES, protocol_prefixes=("TASK:", "TIME:"),
+                                       expected=[f"TASK:{task}="], cpus=cpus)
+                usage.update(run_proc.usage())
+            for line in run_proc.protocol.splitlines():
+                if line.startswith("TIME:"):
+                    print(line)
+            LOG.debug(f"Run stdout: {run_proc.stdout}")
+            LOG.debug(f"Run stderr: {run_proc.stderr}")
+            LOG.debug(f"Run usage: {run_proc.usage()}{' (stopped after TASK line)' if run_proc.stopped_early else ''}")
+            if run_proc.escaped:
+                # proces mimo skupiny držal výstup otvorený, výsledok sa neberie
+                print(f"{repo_name}: {task}: sandbox escape")
+                task_errors.append(f"{task}: sandbox escape")
+                row_points.append(0)
+            elif run_proc.timed_out:
                 print(f"{repo_name}: {task}: timeout")
                 task_errors.append(f"{task}: timeout")
                 row_points.append(0)
-            except Exception as e:
-                print(f"{repo_name}: {task}: run exception: {e}")
-                task_errors.append(f"{task}: run exception: {e}")
+            elif run_proc.returncode == 0 or run_proc.stopped_early:
+                # stopped_early: TASK riadok je vonku, program len neskončil sám
+                pt = parse_points_from_output(run_proc.protocol, task)
+                print(f"Points parsed: {pt}")
+                row_points.append(pt)
+                total += pt
+                successful = True
+            else:
+                print(f"{repo_name}: {task}: run fail code {run_proc.returncode}")
+                task_errors.append(f"{task}: run fail code {run_proc.returncode}")
                 row_points.append(0)
+        except Exception as e:
+            print(f"{repo_name}: {task}: run exception: {e}")
+            task_errors.append(f"{task}: run exception: {e}")
+            row_points.append(0)
 
-        if successful:
-            print(f"{repo_name}: SUCCESS, total={total}, points={row_points}, path={project_path}")
-            csv_rows.append([repo_name, student_name, project_path] + row_points + [total])
-        else:
-            print(f"{repo_name}: NO TASK PASSED. ERRORS: {', '.join(task_errors)}")
-            csv_rows.append([repo_name, student_name, project_path] + [0] * len(TASKS) + [0])
+    if isinstance(total, float):
+        total = round(total, 2)
+    if successful:
+        print(f"{repo_name}: SUCCESS, total={total}, points={row_points}, path={project_path}")
+        return row_points + [total], task_errors
+    else:
+        LOG.warning(f"{repo_name}: NO TASK PASSED. ERRORS: {', '.join(task_errors)}")
+        return [0] * len(assignment.tasks) + [0], task_errors
+
+def grade_project(idx, group_id, project, pending):
+    """Stiahne projekt raz a ohodnotí ho pre zadania pending; vracia meno zadania -> riadok CSV."""
+    print_section(f"Processing project {idx}: {project.get('path', '')}")
+    target_dir = None
+    try:
+        if not isinstance(project, dict) or 'path' not in project:
+            print(f"{project}: not a valid dict with 'path'")
+            return {}
+
+        repo_name = project['path']
+        student_name = project.get("name", "")
+        project_path = project.get("path_with_namespace", "")
+        row_prefix = [repo_name, student_name, project_path]
+
+        repo_url = project['http_url_to_repo']
+        if repo_url.startswith("https://"):
+            repo_url = repo_url.replace("https://", f"https://{GITLAB_USER}:{GITLAB_TOKEN}@")
+        state_key = project_key(project)
+        rows = {}
+        todo = []
+        remote_shas = {}
+        for assignment in pending:
+            state = OUTPUTS[(group_id, assignment.name)].state
+            if state is not None:
+                tail = reuse_previous_result(state, state_key, assignment.fingerprint, project, repo_url, remote_shas)
+                if tail is not None:
+                    rows[assignment.name] = row_prefix + tail
+                    continue
+            todo.append(assignment)
+        if not todo:
+            return rows
+
+        # path_with_namespace: rovnaké meno repozitára býva v rôznych podskupinách aj skupinách
+        target_dir = WORKSPACES.acquire(project_path or f"{group_id}/{repo_name}")
+
+        # súbory všetkých zadaní sa stiahnu naraz
+        files = list(dict.fromkeys(path for assignment in todo for path in assignment.submission_files))
+        with METRICS.phase(repo_name, "clone"):
+            fetched_ok, missing_files, head_sha = fetch_submission(group_id, project, repo_url, target_dir, files)
+        if not fetched_ok:
+            LOG.warning(f"{repo_name}: NOT SUBMITTED, git clone failed")
+            rows.update((assignment.name, row_prefix + assignment.failed_tail("git_clone_failed"))
+                        for assignment in todo)
+            return rows
+
+        for assignment in todo:
+            if len(ASSIGNMENT_RUNS) > 1:
+                print(f"{repo_name}: grading assignment {assignment.name}")
+            arrays_c_path = os.path.join(target_dir, assignment.submission_files[0])
+            missing = [path for path in assignment.submission_files if path in missing_files]
+            # timeout môže byť len dôsledok zaťaženia, taký výsledok sa neukladá (cache ani INCREMENTAL stav)
+            reusable = True
+            if missing:
+                LOG.warning(f"{repo_name}: {', '.join(missing)} NOT FOUND")
+                tail = assignment.failed_tail(f"{posixpath.basename(missing[0])}_missing")
+            elif assignment.result_cache is None:
+                tail, task_errors = grade_submission(assignment, repo_name, project_path, arrays_c_path)
+                reusable = not any("timeout" in error for error in task_errors)
+            else:
+                computed = {}
+
+                def compute():
+                    tail, task_errors = grade_submission(assignment, repo_name, project_path, arrays_c_path)
+                    computed["reusable"] = not any("timeout" in error for error in task_errors)
+                    return tail, computed["reusable"]
+                key = grading_key(source_fingerprint(arrays_c_path), assignment.fingerprint)
+                tail, source = assignment.result_cache.get_or_compute(key, compute)
+                if source != "computed":
+                    print(f"{repo_name}: reusing {source} result {key[:16]}: {tail}")
+                # na disku sú len výsledky bez timeoutu; pri "inflight" sa to nevie, ráta sa ako timeout
+                reusable = source == "cache" or computed.get("reusable", False)
+
+            state = OUTPUTS[(group_id, assignment.name)].state
+            if state is not None and not reusable:
+                print(f"{repo_name}: result with timeout not saved to incremental state")
+                state.remove(state_key)
+            elif state is not None:
+                state.update(state_key, sha=head_sha, grading=assignment.fingerprint,
+                             last_activity_at=project.get("last_activity_at"), tail=tail)
+            rows[assignment.name] = row_prefix + tail
+        return rows
 
     except Exception as e:
-        print(f"{project.get('path', 'unknown')}: UNEXPECTED ERROR: {str(e)}")
-        csv_rows.append([project.get('path', 'unknown'), "", "", "exception"]*len(TASKS) + ["0"])
-        continue
+        LOG.error(f"{project.get('path', 'unknown')}: UNEXPECTED ERROR: {str(e)}")
+        return {assignment.name: [project.get('path', 'unknown'), "", "", "exception"]*len(assignment.tasks) + ["0"]
+                for assignment in pending}
+    finally:
+        if target_dir is not None:
+            WORKSPACES.release(target_dir)
+
+
+def is_exception_row(row):
+    # riadok z výnimky v grade_project, nie výsledok hodnotenia
+    return len(row) > 3 and row[3] == "exception"
+
+def grade_and_checkpoint(idx, item):
+    group_id, project = item
+    key = project_key(project)
+    rows = {}
+    queue_key = f"{group_id}:{key}"
+    if WORK_QUEUE is not None and key and not WORK_QUEUE.claim(queue_key):
+        print(f"Project {idx}: {project.get('path', '')} taken by another container")
+        return group_id, rows
+    pending = []
+    for assignment in ASSIGNMENT_RUNS:
+        done = OUTPUTS[(group_id, assignment.name)].checkpoint.get(key) if key else None
+        if done and done.get("grading") == assignment.fingerprint:
+            print(f"Project {idx}: {project.get('path', '')} already graded for {assignment.name}, row from checkpoint")
+            rows[assignment.name] = done["row"]
+        else:
+            pending.append(assignment)
+    if not pending:
+        return group_id, rows
+
+    # blok logu projektu sa zapíše naraz (aj do archívu), kľúčom je cesta projektu
+    label = project_label(project)
+    with LOG.project(label or str(idx)):
+        graded = grade_project(idx, group_id, project, pending)
+    for assignment in pending:
+        row = graded.get(assignment.name)
+        output = OUTPUTS[(group_id, assignment.name)]
+        if row is None or is_exception_row(row):
+            # do checkpointu nejde, RESUME=1 projekt ohodnotí znova
+            output.mark_unfinished()
+        if row is not None:
+            with METRICS.phase(row[0], "csv"):
+                output.append_row(row)
+                if not is_exception_row(row):
+                    output.checkpoint.update(key, row=row, grading=assignment.fingerprint)
+        rows[assignment.name] = row
+    if WORK_QUEUE is not None and key:
+        WORK_QUEUE.done(queue_key)
+    return group_id, rows
+
+if WORKERS > 1:
+    print(f"Grading with {WORKERS} workers")
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        graded_rows = list(executor.map(grade_and_checkpoint, itertools.count(1), all_projects))
+else:
+    graded_rows = [grade_and_checkpoint(idx, item) for idx, item in enumerate(all_projects, 1)]
+
+for group_id, rows in graded_rows:
+    for name, row in rows.items():
+        if row is not None:
+            OUTPUTS[(group_id, name)].rows.append(row)
+graded_here = sum(1 for _, rows in graded_rows if rows)
+print(f"Graded {graded_here} projects in group {GITLAB_GROUP_ID}.")
+if WORK_QUEUE is not None:
+    print(f"Work queue: {len(graded_rows) - graded_here} projects taken by other containers")
+
+if MIRRORS is not None:
+    print_section("MIRROR GC")
+    # pri neúplnom zozname (zlyhané API) alebo bez jediného projektu sa nič nemaže
+    if LISTING_ERRORS:
+        print("Mirror GC skipped, project listing is incomplete")
+    elif seen_mirror_keys:
+        MIRRORS.gc(seen_mirror_keys)
+    MIRRORS.enforce_budget()
+
+print(f"Rate limiter: {rate_limiter.stats()}")
+print(f"Workspaces: {WORKSPACES.close()}")
 
 print_section("WRITING CSV")
-with open(CSV_FILE, "w", encoding="utf-8", newline='') as f:
-    writer = csv.writer(f)
-    for row in csv_rows:
-        writer.writerow(row)
+for output in OUTPUTS.values():
+    output.write_final(listing_complete=not LISTING_ERRORS)
+    print(f"{output.csv_file}: {len(output.rows)} rows (group {output.group_id}, {output.assignment.name})")
+if SHARD or WORK_QUEUE is not None:
+    # podľa manifestov merge_results.py zistí chýbajúce shardy a projekty
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump({"container": CONTAINER_ID, "shard": f"{SHARD[0]}/{SHARD[1]}" if SHARD else None,
+                   "work_queue": WORK_QUEUE_PATH or None, "csv_files": [output.csv_file for output in OUTPUTS.values()],
+                   "discovered": DISCOVERED, "listing_errors": LISTING_ERRORS}, f, indent=1)
+    print(f"Manifest: {MANIFEST_FILE}")
+
+print_section("TIMINGS")
+print(METRICS.summary(SLOWEST_REPOS))
+if TRACE_FILE:
+    METRICS.write_chrome_trace(TRACE_FILE)
+    print(f"Chrome trace: {TRACE_FILE}")
+METRICS.close()
+
+if LISTING_ERRORS:
+    LOG.error(f"Project listing incomplete, results are missing projects: {'; '.join(LISTING_ERRORS)}")
 
 print_section("LOG ENDED")
 print(f"Ended: {time.ctime()}")
+if LISTING_ERRORS:
+    sys.exit(1)
 
 # stdout sa už neuzatvára, ostáva otvorený pre docker
@@ -1,12 +1,107 @@
+import functools
+import hashlib
+import os
 import re
 import subprocess
+import threading
+
+# tokeny C zdrojáku; žiadna alternatíva nemá vnorené kvantifikátory, match je lineárny
+C_TOKEN_RE = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v]+)
+  | (?P<comment>//[^\n]*|/\*(?:.*?\*/|.*\Z))
+  | (?P<literal>"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?)
+  | (?P<word>[A-Za-z0-9_]+)
+  | (?P<punct>.)
+""", re.DOTALL | re.VERBOSE)
+# direktíva preprocesora až po koniec riadku vrátane pokračovaní cez '\'
+C_DIRECTIVE_RE = re.compile(r"#(?:\\\r?\n|[^\n])*")
+
+def find_main_definitions(code):
+    """Vráti [(start, end)] definícií funkcie main na najvyššej úrovni.
+
+    Jeden prechod cez tokeny; komentáre, reťazce, znakové literály
+    a direktívy preprocesora sa preskakujú, takže zátvorky v nich
+    nerozbijú počítanie hĺbky.
+    """
+    spans = []
+    depth = 0
+    paren_depth = 0
+    decl_start = None
+    # 0 = nič, 1 = videli sme main, 2 = v zozname parametrov, 3 = za ')', 4 = v tele
+    phase = 0
+    line_start = True
+    pos = 0
+    n = len(code)
+    while pos < n:
+        if line_start and code[pos] == "#":
+            pos = C_DIRECTIVE_RE.match(code, pos).end()
+            continue
+        m = C_TOKEN_RE.match(code, pos)
+        kind = m.lastgroup
+        start, pos = m.start(), m.end()
+        if kind == "newline":
+            line_start = True
+            continue
+        if kind in ("space", "comment"):
+            continue
+        line_start = False
+        token = m.group()
+
+        if depth == 0 and decl_start is None and token not in (";", "}"):
+            decl_start = start
+
+        if phase == 1:
+            phase = 2 if token == "(" else 0
+            paren_depth = 1 if phase == 2 else 0
+            continue
+        if phase == 2:
+            if token == "(":
+                paren_depth += 1
+            elif token == ")":
+                paren_depth -= 1
+                if paren_depth == 0:
+                    phase = 3
+            continue
+        if phase == 3:
+            if token in (";", ",", "=", ")"):
+                phase = 0
+            elif token != "{":
+                continue
+        if kind == "word" and token == "main" and depth == 0 and phase == 0:
+            phase = 1
+            continue
+
+        if token == "{":
+            if phase == 3:
+                phase = 4
+            depth += 1
+        elif token == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                if phase == 4:
+                    spans.append((decl_start, pos))
+                    phase = 0
+                decl_start = None
+        elif token == ";" and depth == 0:
+            decl_start = None
+    return spans
+
+def strip_main(code):
+    # main sa nahradí rovnakým počtom riadkov, aby čísla riadkov v chybách gcc sedeli
+    parts = []
+    last = 0
+    for start, end in find_main_definitions(code):
+        parts.append(code[last:start])
+        parts.append("\n" * code.count("\n", start, end))
+        last = end
+    parts.append(code[last:])
+    return "".join(parts)
 
 def remove_main_from_c(source_path, target_path):
     with open(source_path, 'r', encoding='utf-8') as f:
         code = f.read()
-    code_no_main = re.sub(
-        r'int\s+main\s*\([^)]*\)\s*\{(?:[^{}]|\{[^{}]*\})*\}',
-        '', code, flags=re.DOTALL)
+    code_no_main = strip_main(code)
     with open(target_path, 'w', encoding='utf-8') as f:
         f.write(code_no_main)
 
@@ -16,3 +111,560 @@ def compile_and_run_test(arrays_nomains_path, main_test_path, output_bin_path):
 
 def run_binary(binary_path):
     return subprocess.run([binary_path], capture_output=True, text=True)
+
+def compile_object(source_path, object_path, timeout=None, cflags=()):
+    gcc_cmd = ["gcc", *cflags, "-c", source_path, "-o", object_path]
+    return subprocess.run(gcc_cmd, capture_output=True, text=True, timeout=timeout)
+
+def compile_shared_library(source_path, library_path, timeout=None, cflags=()):
+    # zdieľaná knižnica pre ctypes_runner.py (funkcie sa volajú priamo z Pythonu)
+    gcc_cmd = ["gcc", *cflags, "-shared", "-fPIC", source_path, "-o", library_path, "-lm"]
+    return subprocess.run(gcc_cmd, capture_output=True, text=True, timeout=timeout)
+
+def link_binary(object_paths, output_bin_path, timeout=None):
+    gcc_cmd = ["gcc", *object_paths, "-o", output_bin_path, "-lm"]
+    return subprocess.run(gcc_cmd, capture_output=True, text=True, timeout=timeout)
+
+def defined_symbols(object_path):
+    # globálne symboly, ktoré objekt definuje (funkcie aj dáta)
+    nm_proc = subprocess.run(["nm", "--defined-only", "-g", "-P", object_path],
+                             capture_output=True, text=True, check=True)
+    return {line.split()[0] for line in nm_proc.stdout.splitlines() if line.strip()}
+
+@functools.lru_cache(maxsize=None)
+def compiler_identity():
+    gcc_proc = subprocess.run(["gcc", "--version"], capture_output=True, text=True, check=True)
+    return gcc_proc.stdout.splitlines()[0]
+
+def object_cache_key(source_path, cflags=(), objcopy_args=()):
+    h = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        h.update(f.read())
+    h.update(b"\0" + compiler_identity().encode("utf-8"))
+    h.update(b"\0" + "\0".join(cflags).encode("utf-8"))
+    if objcopy_args:
+        h.update(b"\0objcopy\0" + "\0".join(objcopy_args).encode("utf-8"))
+    return h.hexdigest()
+
+def build_cached_object(source_path, cache_dir, cflags=(), timeout=None, objcopy_args=()):
+    """Skompiluje source do cache_dir, kľúčom je hash obsahu, verzia gcc a flagy.
+
+    Ak sú zadané objcopy_args, objekt sa nimi po kompilácii upraví
+    (napr. --localize-symbol=main) a aj tie sú súčasťou kľúča.
+    Vracia (object_path, proc); proc je None, ak objekt už bol v cache.
+    Pri chybe kompilácie alebo objcopy je object_path None.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    object_path = os.path.join(cache_dir, f"{stem}-{object_cache_key(source_path, cflags, objcopy_args)[:16]}.o")
+    if os.path.exists(object_path):
+        return object_path, None
+    tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    gcc_proc = compile_object(source_path, tmp_path, timeout=timeout, cflags=cflags)
+    if gcc_proc.returncode != 0:
+        return None, gcc_proc
+    if objcopy_args:
+        objcopy_proc = subprocess.run(["objcopy", *objcopy_args, tmp_path], capture_output=True, text=True)
+        if objcopy_proc.returncode != 0:
+            os.remove(tmp_path)
+            return None, objcopy_proc
+    os.replace(tmp_path, object_path)
+    return object_path, gcc_proc
+
+DRIVER_TEMPLATE = r"""/* generated by test_helpers.generate_driver_source, do not edit */
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <signal.h>
+#include <unistd.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+
+#define TASK_TIMEOUT %(timeout)d
+
+%(declarations)s
+/* slabé stuby: chýbajúca študentská funkcia nerozbije link ostatných taskov */
+%(stubs)s
+static const struct {
+    const char *name;
+    int (*run)(void);
+} tasks[] = {
+%(table)s
+};
+
+static int run_task(const char *name, int (*run)(void)) {
+    fflush(stdout);
+    fflush(stderr);
+    pid_t pid = fork();
+    if (pid < 0) {
+        printf("STATUS:%%s=fork_failed\n", name);
+        return 1;
+    }
+    if (pid == 0) {
+        alarm(TASK_TIMEOUT);
+        exit(run());
+    }
+    int status = 0;
+    while (waitpid(pid, &status, 0) < 0) {
+    }
+    if (WIFEXITED(status)) {
+        printf("STATUS:%%s=exit:%%d\n", name, WEXITSTATUS(status));
+    } else if (WIFSIGNALED(status) && WTERMSIG(status) == SIGALRM) {
+        printf("STATUS:%%s=timeout\n", name);
+    } else if (WIFSIGNALED(status)) {
+        printf("STATUS:%%s=signal:%%d\n", name, WTERMSIG(status));
+    }
+    fflush(stdout);
+    return 0;
+}
+
+int main(int argc, char *argv[]) {
+    for (int i = 1; i < argc; i++) {
+        size_t j = 0;
+        for (; j < sizeof(tasks) / sizeof(tasks[0]); j++) {
+            if (strcmp(argv[i], tasks[j].name) == 0) {
+                run_task(tasks[j].name, tasks[j].run);
+                break;
+            }
+        }
+        if (j == sizeof(tasks) / sizeof(tasks[0])) {
+            printf("STATUS:%%s=unknown\n", argv[i]);
+        }
+    }
+    return 0;
+}
+"""
+
+def driver_main_symbol(task):
+    return f"harness_main_{task}"
+
+def generate_driver_source(tasks, symbols, timeout):
+    """C zdroják drivera, ktorý spustí vybrané tasky (z argv) v samostatných forkoch.
+
+    tasks sú mená taskov; harness každého tasku musí byť skompilovaný
+    s -Dmain=harness_main_<task>. symbols sú študentské funkcie, pre ktoré
+    sa vygeneruje slabý stub.
+    """
+    declarations = "\n".join(f"int {driver_main_symbol(task)}();" for task in tasks)
+    stubs = "\n".join(
+        f"__attribute__((weak)) void {symbol}(void) {{ _exit(127); }}" for symbol in sorted(set(symbols)))
+    table = "\n".join(f'    {{"{task}", {driver_main_symbol(task)}}},' for task in tasks)
+    return DRIVER_TEMPLATE % {
+        "timeout": timeout,
+        "declarations": declarations,
+        "stubs": stubs,
+        "table": table,
+    }
+
+def parse_driver_status(output):
+    # STATUS:<task>=exit:<n> | timeout | signal:<n> | ...
+    statuses = {}
+    for line in output.splitlines():
+        if line.startswith("STATUS:") and "=" in line:
+            task, status = line[len("STATUS:"):].split("=", 1)
+            statuses[task] = status
+    return statuses
+
+VECTOR_HARNESS_TEMPLATE = r"""/* generated by test_helpers.generate_vector_harness, do not edit */
+#include <stdio.h>
+#include <math.h>
+
+%(prototype)s;
+
+#define OUT_CAPACITY %(out_capacity)d
+%(pools)s
+static const struct {
+%(fields)s
+} cases[] = {
+%(rows)s
+};
+
+int main(void) {
+    int passed = 0;
+    int failures_shown = 0;
+    const int total = (int)(sizeof(cases) / sizeof(cases[0]));
+    for (int c = 0; c < total; c++) {
+%(buffers)s
+        %(call)s;
+        int ok = 1;
+%(checks)s
+        if (ok) {
+            passed++;
+        } else if (failures_shown++ < %(show_failures)d) {
+            printf("FAIL:%(task)s=case %%d\n", c);
+        }
+    }
+    printf("CASES:%(task)s=%%d/%%d\n", passed, total);
+    /* nadol, inak by napr. 299/300 prípadov dalo 1.00 = plný počet bodov */
+    printf("TASK:%(task)s=%%.2f\n", floor(%(points)s * passed * 100.0 / total + 1e-9) / 100.0);
+    return 0;
+}
+"""
+
+VECTOR_SCALAR_TYPES = ("int", "long", "unsigned", "float", "double")
+
+def _c_literal(value, c_type):
+    if c_type in ("float", "double"):
+        return repr(float(value))
+    return str(int(value))
+
+def _c_equal(actual, expected, c_type, tolerance):
+    if c_type in ("float", "double"):
+        return f"fabs((double)({actual}) - (double)({expected})) <= {tolerance!r}"
+    return f"({actual}) == ({expected})"
+
+def _parse_params(task, params, returns):
+    # [(druh, typ)], druh je "scalar", "in" (vstupné pole) alebo "out" (výstupné pole)
+    kinds = []
+    for param in params:
+        if param.startswith("out ") and param.endswith("[]"):
+            kinds.append(("out", param[4:-2].strip()))
+        elif param.endswith("[]"):
+            kinds.append(("in", param[:-2].strip()))
+        else:
+            kinds.append(("scalar", param))
+    for _, c_type in kinds + [("return", returns)]:
+        if c_type not in VECTOR_SCALAR_TYPES and c_type != "void":
+            raise ValueError(f"{task}: unsupported type {c_type}")
+    return kinds
+
+def _prototype(symbol, kinds, returns):
+    prototype_params = []
+    for kind, c_type in kinds:
+        if kind == "in":
+            prototype_params.append(f"const {c_type} *")
+        elif kind == "out":
+            prototype_params.append(f"{c_type} *")
+        else:
+            prototype_params.append(c_type)
+    return f"{returns} {symbol}({', '.join(prototype_params) or 'void'})"
+
+def generate_vector_harness(task, symbol, spec):
+    """C harness, ktorý v jednom procese prejde všetky testovacie vektory tasku.
+
+    spec (z TEST_VECTORS v module zadania):
+      returns   -- návratový typ ("int", "float", ..., "void")
+      params    -- typy parametrov: skalár ("int", "float", ...), vstupné pole ("int[]")
+                   alebo výstupné pole ("out int[]")
+      cases     -- [(argumenty, očakávaná návratová hodnota)]; pri výstupnom poli je
+                   argumentom očakávaný obsah poľa (funkcia dostane nulový buffer)
+      tolerance -- povolená odchýlka pre float/double (predvolene 1e-6)
+      points    -- body za všetky prípady (predvolene 1), za časť prípadov pomerná časť
+    Výstup: TASK:<task>=<body> (nadol na 2 desatinné miesta), CASES:<task>=<prešlo>/<spolu>
+    a prvých pár FAIL:<task>=case <i>.
+    """
+    returns = spec.get("returns", "int")
+    params = spec["params"]
+    cases = spec["cases"]
+    tolerance = spec.get("tolerance", 1e-6)
+    if not cases:
+        raise ValueError(f"{task}: no test vectors")
+
+    kinds = _parse_params(task, params, returns)
+    prototype = _prototype(symbol, kinds, returns)
+
+    # polia všetkých prípadov sú v jednom statickom poole na parameter, prípad drží offset
+    pools = [[] for _ in params]
+    rows = []
+    out_capacity = 1
+    for args, expected in cases:
+        if len(args) != len(params):
+            raise ValueError(f"{task}: case {args!r} does not match params {params!r}")
+        fields = []
+        for i, ((kind, c_type), value) in enumerate(zip(kinds, args)):
+            if kind == "scalar":
+                fields.append(_c_literal(value, c_type))
+                continue
+            fields.append(str(len(pools[i])))
+            if kind == "out":
+                fields.append(str(len(value)))
+            pools[i].extend(_c_literal(item, c_type) for item in value)
+            # buffer musí stačiť aj na najväčšie vstupné pole (funkcia môže zapisovať podľa neho)
+            out_capacity = max(out_capacity, len(value))
+        if returns != "void":
+            fields.append(_c_literal(expected, returns))
+        rows.append("    {" + ", ".join(fields) + "},")
+
+    pool_lines = []
+    field_lines = []
+    buffer_lines = []
+    call_args = []
+    check_lines = []
+    for i, (kind, c_type) in enumerate(kinds):
+        if kind == "scalar":
+            field_lines.append(f"    {c_type} p{i};")
+            call_args.append(f"cases[c].p{i}")
+            continue
+        # prázdne pole inicializátorov C nepovoľuje
+        pool_lines.append(f"static const {c_type} pool{i}[] = {{{', '.join(pools[i]) or '0'}}};")
+        field_lines.append(f"    int p{i}_off;")
+        if kind == "in":
+            call_args.append(f"pool{i} + cases[c].p{i}_off")
+            continue
+        field_lines.append(f"    int p{i}_len;")
+        buffer_lines.append(f"        {c_type} out{i}[OUT_CAPACITY] = {{0}};")
+        call_args.append(f"out{i}")
+        check_lines.append(
+            f"        for (int k = 0; k < cases[c].p{i}_len; k++) {{\n"
+            f"            if (!({_c_equal(f'out{i}[k]', f'pool{i}[cases[c].p{i}_off + k]', c_type, tolerance)})) ok = 0;\n"
+            f"        }}")
+    call = f"{symbol}({', '.join(call_args)})"
+    if returns != "void":
+        field_lines.append(f"    {returns} expected;")
+        call = f"{returns} result = {call}"
+        check_lines.insert(0, f"        if (!({_c_equal('result', 'cases[c].expected', returns, tolerance)})) ok = 0;")
+    if not field_lines:
+        field_lines.append("    int unused;")
+        rows = ["    {0}," for _ in cases]
+
+    return VECTOR_HARNESS_TEMPLATE % {
+        "prototype": prototype,
+        "out_capacity": out_capacity,
+        "pools": "\n".join(pool_lines),
+        "fields": "\n".join(field_lines),
+        "rows": "\n".join(rows),
+        "buffers": "\n".join(buffer_lines),
+        "call": call,
+        "checks": "\n".join(check_lines),
+        "show_failures": 5,
+        "task": task,
+        "points": repr(float(spec.get("points", 1))),
+    }
+
+BENCHMARK_HARNESS_TEMPLATE = r"""/* generated by test_helpers.generate_benchmark_harness, do not edit */
+#define _POSIX_C_SOURCE 200809L
+#include <stdio.h>
+#include <limits.h>
+#include <math.h>
+#include <time.h>
+
+%(prototype)s;
+
+/* referenčné riešenie, premenované, aby sa nebilo so študentským */
+#define %(symbol)s reference_%(symbol)s
+%(reference)s
+#undef %(symbol)s
+
+#define OUT_CAPACITY %(out_capacity)d
+#define WARMUP %(warmup)d
+#define REPEAT %(repeat)d
+#define MIN_ROUND_NS %(min_round_ns)dLL
+#define GIVE_UP_RATIO %(give_up_ratio)r
+%(pools)s
+static const struct {
+%(fields)s
+} inputs[] = {
+%(rows)s
+};
+#define INPUTS ((int)(sizeof(inputs) / sizeof(inputs[0])))
+
+static volatile double sink;
+
+/* čas CPU vlákna: preempcia inými procesmi sa do merania nezapočíta */
+static long long now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_THREAD_CPUTIME_ID, &ts);
+    return ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
+/* jedno kolo: iters-krát všetky vstupy; po prekročení limit_ns sa preruší a čas sa extrapoluje */
+static long long round_student(long long iters, long long limit_ns) {
+%(round_buffers)s
+    long long start = now_ns();
+    for (long long it = 0; it < iters; it++) {
+        for (int c = 0; c < INPUTS; c++) {
+            %(student_call)s
+        }
+        long long elapsed = now_ns() - start;
+        if (elapsed > limit_ns) return elapsed / (it + 1) * iters;
+    }
+    return now_ns() - start;
+}
+
+static long long round_reference(long long iters, long long limit_ns) {
+%(round_buffers)s
+    long long start = now_ns();
+    for (long long it = 0; it < iters; it++) {
+        for (int c = 0; c < INPUTS; c++) {
+            %(reference_call)s
+        }
+        long long elapsed = now_ns() - start;
+        if (elapsed > limit_ns) return elapsed / (it + 1) * iters;
+    }
+    return now_ns() - start;
+}
+
+static int verify(void) {
+    for (int c = 0; c < INPUTS; c++) {
+%(verify_buffers)s
+        %(verify_calls)s
+        int ok = 1;
+%(checks)s
+        if (!ok) {
+            printf("FAIL:%(task)s=input %%d differs from reference\n", c);
+            return 0;
+        }
+    }
+    return 1;
+}
+
+static long long median(long long *values, int n) {
+    for (int i = 1; i < n; i++) {
+        long long v = values[i];
+        int j = i - 1;
+        for (; j >= 0 && values[j] > v; j--) values[j + 1] = values[j];
+        values[j + 1] = v;
+    }
+    return n %% 2 ? values[n / 2] : (values[n / 2 - 1] + values[n / 2]) / 2;
+}
+
+int main(void) {
+    if (!verify()) {
+        printf("TASK:%(task)s=0.00\n");
+        return 0;
+    }
+    /* kalibrácia: kolo referencie musí trvať aspoň MIN_ROUND_NS */
+    long long iters = 1;
+    long long ref_ns;
+    while ((ref_ns = round_reference(iters, LLONG_MAX)) < MIN_ROUND_NS && iters < (1LL << 30)) iters *= 2;
+    long long student[REPEAT], reference[REPEAT];
+    int rounds = 0;
+    double ratio = 0;
+    for (int r = -WARMUP; r < REPEAT; r++) {
+        /* kolá sa striedajú, rušenie zasiahne obe merania rovnako */
+        long long s = round_student(iters, (long long)(GIVE_UP_RATIO * ref_ns));
+        long long ref = round_reference(iters, LLONG_MAX);
+        if (ref < 1) ref = 1;
+        ref_ns = ref;
+        if (s > GIVE_UP_RATIO * ref) {
+            /* príliš pomalé, ďalšie kolá by len míňali čas */
+            ratio = (double)s / ref;
+            rounds = 0;
+            break;
+        }
+        if (r >= 0) {
+            student[rounds] = s;
+            reference[rounds] = ref;
+            rounds++;
+        }
+    }
+    long long student_ns = rounds ? median(student, rounds) : 0;
+    long long reference_ns = rounds ? median(reference, rounds) : 0;
+    if (rounds) ratio = (double)student_ns / (reference_ns ? reference_ns : 1);
+    printf("TIME:%(task)s=student %%lld ns, reference %%lld ns, ratio %%.3f, rounds %%d, iters %%lld\n",
+           student_ns, reference_ns, ratio, rounds, iters);
+    printf("TASK:%(task)s=%%.2f\n", %(points)s);
+    return 0;
+}
+"""
+
+def generate_benchmark_harness(task, symbol, spec):
+    """C harness, ktorý porovná rýchlosť študentskej funkcie s referenčným riešením.
+
+    spec (z BENCHMARKS v module zadania):
+      returns, params -- ako pri TEST_VECTORS; výstupné pole dostane buffer
+                         s out_capacity prvkami (predvolene najdlhšie vstupné pole)
+      reference       -- C zdroják referenčnej funkcie s menom symbol
+      inputs          -- [argumenty]; na mieste výstupného poľa je None
+      tolerance       -- pre kontrolu výsledkov voči referencii (predvolene 1e-6)
+      warmup, repeat  -- počet zahrievacích a meraných kôl (predvolene 2 a 7)
+      min_round_ms    -- kalibrácia: kolo referencie trvá aspoň toľko (predvolene 10)
+      points, scale   -- body za pomer medián(študent) / medián(referencia):
+                         scale = [(max_pomer, podiel bodov)], predvolene [(1.5, 1), (3, 0.5)]
+    Funkcia musí na vstupoch vrátiť to isté čo referencia, inak 0 bodov.
+    Výstup: TASK:<task>=<body>, TIME:<task>=... a pri chybe FAIL:<task>=...
+    """
+    returns = spec.get("returns", "int")
+    inputs = spec["inputs"]
+    tolerance = spec.get("tolerance", 1e-6)
+    if not inputs:
+        raise ValueError(f"{task}: no benchmark inputs")
+    kinds = _parse_params(task, spec["params"], returns)
+    scale = sorted(spec.get("scale", [(1.5, 1.0), (3.0, 0.5)]))
+
+    pools = [[] for _ in kinds]
+    rows = []
+    out_capacity = 1
+    for args in inputs:
+        if len(args) != len(kinds):
+            raise ValueError(f"{task}: input {args!r} does not match params {spec['params']!r}")
+        fields = []
+        for i, ((kind, c_type), value) in enumerate(zip(kinds, args)):
+            if kind == "scalar":
+                fields.append(_c_literal(value, c_type))
+            elif kind == "in":
+                fields.append(str(len(pools[i])))
+                pools[i].extend(_c_literal(item, c_type) for item in value)
+                out_capacity = max(out_capacity, len(value))
+        rows.append("    {" + (", ".join(fields) or "0") + "},")
+    out_capacity = spec.get("out_capacity", out_capacity)
+
+    pool_lines = []
+    field_lines = []
+    round_buffers = []
+    verify_buffers = []
+    student_args = []
+    reference_args = []
+    check_lines = []
+    for i, (kind, c_type) in enumerate(kinds):
+        if kind == "scalar":
+            field_lines.append(f"    {c_type} p{i};")
+            student_args.append(f"inputs[c].p{i}")
+            reference_args.append(f"inputs[c].p{i}")
+        elif kind == "in":
+            pool_lines.append(f"static const {c_type} pool{i}[] = {{{', '.join(pools[i]) or '0'}}};")
+            field_lines.append(f"    int p{i}_off;")
+            student_args.append(f"pool{i} + inputs[c].p{i}_off")
+            reference_args.append(f"pool{i} + inputs[c].p{i}_off")
+        else:
+            round_buffers.append(f"    static {c_type} out{i}[OUT_CAPACITY];")
+            verify_buffers.append(f"        static {c_type} out{i}[OUT_CAPACITY], ref_out{i}[OUT_CAPACITY];\n"
+                                  f"        for (int k = 0; k < OUT_CAPACITY; k++) out{i}[k] = ref_out{i}[k] = 0;")
+            student_args.append(f"out{i}")
+            reference_args.append(f"ref_out{i}")
+            check_lines.append(
+                f"        for (int k = 0; k < OUT_CAPACITY; k++) {{\n"
+                f"            if (!({_c_equal(f'out{i}[k]', f'ref_out{i}[k]', c_type, tolerance)})) ok = 0;\n"
+                f"        }}")
+    if not field_lines:
+        field_lines.append("    int unused;")
+    # výstupné polia v kolách majú rovnaké mená ako v študentskom volaní
+    round_reference_args = [arg.replace("ref_out", "out") for arg in reference_args]
+    student_call = f"{symbol}({', '.join(student_args)})"
+    reference_call = f"reference_{symbol}({', '.join(round_reference_args)})"
+    verify_reference_call = f"reference_{symbol}({', '.join(reference_args)})"
+    if returns != "void":
+        # výsledok do volatile, aby sa volanie nedalo vynechať
+        round_student_call = f"sink += (double){student_call};"
+        round_reference_call = f"sink += (double){reference_call};"
+        verify_calls = f"{returns} result = {student_call};\n        {returns} expected = {verify_reference_call};"
+        check_lines.insert(0, f"        if (!({_c_equal('result', 'expected', returns, tolerance)})) ok = 0;")
+    else:
+        round_student_call = f"{student_call};"
+        round_reference_call = f"{reference_call};"
+        verify_calls = f"{student_call};\n        {verify_reference_call};"
+
+    points = float(spec.get("points", 1))
+    points_expr = " : ".join(f"ratio <= {ratio!r} ? {points * fraction!r}" for ratio, fraction in scale) + " : 0.0"
+    return BENCHMARK_HARNESS_TEMPLATE % {
+        "prototype": _prototype(symbol, kinds, returns),
+        "symbol": symbol,
+        "reference": spec["reference"].strip(),
+        "out_capacity": out_capacity,
+        "warmup": spec.get("warmup", 2),
+        "repeat": spec.get("repeat", 7),
+        "min_round_ns": int(spec.get("min_round_ms", 10) * 1000000),
+        "give_up_ratio": 2 * float(scale[-1][0]),
+        "pools": "\n".join(pool_lines),
+        "fields": "\n".join(field_lines),
+        "rows": "\n".join(rows),
+        "round_buffers": "\n".join(round_buffers),
+        "student_call": round_student_call,
+        "reference_call": round_reference_call,
+        "verify_buffers": "\n".join(verify_buffers),
+        "verify_calls": verify_calls,
+        "checks": "\n".join(check_lines),
+        "task": task,
+        "points": points_expr,
+    }
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def parse_shard(text):
+    """"i/n" (i od 1 po n, ako CI_NODE_INDEX/CI_NODE_TOTAL) -> (i, n), prázdny text -> None."""
+    if not text:
+        return None
+    index, count = (int(part) for part in text.split("/"))
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard {text!r}, expected i/n with 1 <= i <= n")
+    return index, count
+
+
+def shard_of(path, count):
+    # stabilný hash (nie hash(), ten je pre každý proces iný)
+    return int.from_bytes(hashlib.sha256(path.encode("utf-8")).digest()[:8], "big") % count + 1
+
+
+class SqliteWorkQueue:
+    """Zdieľaný zoznam rozobratých projektov v SQLite súbore (lokálny disk, nie NFS).
+
+    claim(key) vráti True, ak projekt hodnotí tento kontajner: nikto ho
+    ešte nemá, má ho on sám (reštart s tým istým CONTAINER_ID) alebo ho iný
+    kontajner rozobral pred viac ako stale_sec a nedokončil. Kľúče sú
+    v rámci behu run, záznamy z iného behu v tom istom súbore sa ignorujú.
+    """
+
+    def __init__(self, path, owner, stale_sec, run):
+        self.path = path
+        self.owner = owner
+        self.stale_sec = stale_sec
+        self.run = run
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS claims (project TEXT PRIMARY KEY, owner TEXT NOT NULL,"
+                       " claimed_at REAL NOT NULL, done INTEGER NOT NULL DEFAULT 0)")
+
+    def _connect(self):
+        # spojenie na vlákno, sqlite3 spojenia sa medzi vláknami nezdieľajú
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        return db
+
+    def claim(self, key):
+        key = f"{self.run}:{key}"
+        db = self._connect()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT owner, claimed_at, done FROM claims WHERE project = ?", (key,)).fetchone()
+            if row is None:
+                db.execute("INSERT INTO claims (project, owner, claimed_at) VALUES (?, ?, ?)", (key, self.owner, now))
+                claimed = True
+            elif row[0] == self.owner:
+                claimed = True
+            elif not row[2] and row[1] < now - self.stale_sec:
+                db.execute("UPDATE claims SET owner = ?, claimed_at = ? WHERE project = ?", (self.owner, now, key))
+                print(f"Work queue: taking over {key} from {row[0]} (stale claim)")
+                claimed = True
+            else:
+                claimed = False
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def done(self, key):
+        key = f"{self.run}:{key}"
+        self._connect().execute("UPDATE claims SET done = 1 WHERE project = ? AND owner = ?", (key, self.owner))
+
+
+class LockDirWorkQueue:
+    """To isté ako SqliteWorkQueue, ale adresár lock súborov (funguje aj na zdieľanom FS).
+
+    <hash>.claim vzniká cez O_CREAT|O_EXCL, <hash>.done po ohodnotení.
+    Starý nedokončený claim sa preberá premenovaním, ktoré uspeje len raz.
+    Súbory jedného behu sú v podadresári podľa hashu run.
+    """
+
+    def __init__(self, path, owner, stale_sec, run):
+        self.path = os.path.join(path, hashlib.sha256(run.encode("utf-8")).hexdigest()[:16])
+        self.owner = owner
+        self.stale_sec = stale_sec
+        os.makedirs(self.path, exist_ok=True)
+
+    def _paths(self, key):
+        stem = os.path.join(self.path, hashlib.sha256(key.encode("utf-8")).hexdigest()[:24])
+        return f"{stem}.claim", f"{stem}.done"
+
+    def _create(self, path, key):
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"project": key, "owner": self.owner}))
+
+    def claim(self, key, _retry=True):
+        claim_path, done_path = self._paths(key)
+        try:
+            self._create(claim_path, key)
+            return True
+        except FileExistsError:
+            pass
+        try:
+            with open(claim_path, encoding="utf-8") as f:
+                owner = json.load(f).get("owner")
+            claimed_at = os.stat(claim_path).st_mtime
+        except (OSError, ValueError):
+            # práve vzniká alebo ho niekto preberá
+            return False
+        if owner == self.owner:
+            return True
+        if os.path.exists(done_path) or claimed_at >= time.time() - self.stale_sec or not _retry:
+            return False
+        try:
+            os.rename(claim_path, f"{claim_path}.stale-{owner}-{self.owner}-{os.getpid()}")
+        except FileNotFoundError:
+            return False
+        print(f"Work queue: taking over {key} from {owner} (stale claim)")
+        try:
+            self._create(claim_path, key)
+            return True
+        except FileExistsError:
+            return self.claim(key, _retry=False)
+
+    def done(self, key):
+        _, done_path = self._paths(key)
+        try:
+            self._create(done_path, key)
+        except FileExistsError:
+            pass
+
+
+def open_work_queue(path, owner, stale_sec, run):
+    """*.sqlite / *.db = SqliteWorkQueue, inak adresár pre LockDirWorkQueue.
+
+    run musí byť spoločný pre kontajnery jedného behu a iný pre každý beh,
+    inak nový beh považuje projekty z minulého behu za rozobraté.
+    """
+    if not run:
+        raise ValueError("work queue needs a run id shared by the containers of one run")
+    if path.endswith((".sqlite", ".sqlite3", ".db")):
+        return SqliteWorkQueue(path, owner, stale_sec, run)
+    return LockDirWorkQueue(path, owner, stale_sec, run)
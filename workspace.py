@@ -0,0 +1,201 @@
+import fcntl
+import itertools
+import os
+import queue
+import shutil
+import threading
+import time
+
+from mirror_store import dir_size
+
+
+def usable_root(path):
+    """Dôvod, prečo sa path nedá použiť ako pracovný adresár, alebo None.
+
+    Binárky a .so sa z workspace spúšťajú, preto nesmie byť noexec
+    (Docker štandardne montuje /dev/shm s noexec).
+    """
+    try:
+        os.makedirs(path, exist_ok=True)
+        flags = os.statvfs(path).f_flag
+    except OSError as e:
+        return str(e)
+    if flags & os.ST_NOEXEC:
+        return "mounted noexec"
+    if flags & os.ST_RDONLY:
+        return "mounted read-only"
+    return None
+
+
+# súbor, ktorým pool označí svoj adresár; flock na ňom drží, kým beží
+POOL_MARKER = ".workspace-pool"
+
+
+class PoolDir:
+    """Vyhradený podadresár poolu <base>/workspaces_<owner> so značkou POOL_MARKER.
+
+    Zvyšky z prerušeného behu sa mažú len v adresári so značkou (vytvoril ho pool);
+    neprázdny adresár bez značky alebo adresár, ktorý drží iný bežiaci proces, je chyba.
+    """
+
+    def __init__(self, base, owner):
+        self.path = os.path.join(base, f"workspaces_{owner}")
+        os.makedirs(self.path, exist_ok=True)
+        marker_path = os.path.join(self.path, POOL_MARKER)
+        self.created_by_pool = os.path.exists(marker_path)
+        if not self.created_by_pool and os.listdir(self.path):
+            raise ValueError(f"{self.path} is not empty and was not created by the workspace pool")
+        self._marker = open(marker_path, "a")
+        try:
+            fcntl.flock(self._marker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._marker.close()
+            raise ValueError(f"{self.path} is used by another running grader") from None
+
+    def leftovers(self):
+        """Položky z minulého behu (okrem značky a .trash)."""
+        if not self.created_by_pool:
+            return []
+        return [os.path.join(self.path, entry) for entry in os.listdir(self.path)
+                if entry not in (POOL_MARKER, ".trash")]
+
+    def close(self):
+        self._marker.close()
+
+
+class WorkspacePool:
+    """Dočasné adresáre pre projekty, prednostne na tmpfs, s limitom veľkosti.
+
+    Adresáre vznikajú len vo vyhradenom podadresári workspaces_<owner> v root
+    a spill_root (PoolDir), ostatný obsah root a spill_root sa nemení.
+    acquire(name) vytvorí prázdny adresár, release(path) ho premenuje do
+    .trash (rename na tom istom FS, O(1)) a zmaže ho až vlákno reaper
+    na pozadí, takže rmtree nie je v kritickej ceste. Veľkosť sa odhaduje
+    z uvoľnených adresárov (živé × priemer + ešte nezmazaný odpad); keď by
+    tmpfs prekročil max_bytes alebo na ňom dochádza miesto, acquire chvíľu
+    počká na reaper a potom použije spill_root na disku.
+    """
+
+    def __init__(self, root, spill_root, max_bytes, owner, keep=False, wait_sec=5):
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self.wait_sec = wait_sec
+        problem = usable_root(root) if root else "not configured"
+        if problem:
+            if root:
+                print(f"Workspace root {root} not usable ({problem}), using {spill_root}")
+            root = None
+        elif os.path.realpath(root) == os.path.realpath(spill_root):
+            root = None
+        self._dirs = [PoolDir(spill_root, owner)]
+        if root is not None:
+            self._dirs.append(PoolDir(root, owner))
+        self.spill_root = self._dirs[0].path
+        self.root = self._dirs[1].path if root is not None else None
+        self._lock = threading.Condition()
+        self._live = {}
+        self._trash_bytes = 0
+        self._released = 0
+        self._released_bytes = 0
+        self._seq = itertools.count()
+        self._queue = queue.Queue()
+        self.stats = {"tmpfs": 0, "spilled": 0, "reaped": 0, "reap_sec": 0.0}
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+        for pool_dir in self._dirs:
+            base = pool_dir.path
+            os.makedirs(os.path.join(base, ".trash"), exist_ok=True)
+            # zvyšky z prerušeného behu (len v adresári poolu) sa zmažú na pozadí
+            for path in pool_dir.leftovers():
+                self._discard(base, path, 0)
+            for entry in os.listdir(os.path.join(base, ".trash")):
+                self._queue.put((os.path.join(base, ".trash", entry), 0))
+
+    def _average(self):
+        return self._released_bytes / self._released if self._released else 0
+
+    def _tmpfs_has_room(self):
+        estimate = self._average()
+        used = self._trash_bytes + sum(1 for base in self._live.values() if base == self.root) * estimate
+        if used + estimate > self.max_bytes:
+            return False
+        stat = os.statvfs(self.root)
+        return stat.f_bavail * stat.f_frsize > 2 * estimate
+
+    def _in_use(self, path):
+        return any(live == path or live.startswith(path + os.sep) or path.startswith(live + os.sep)
+                   for live in self._live)
+
+    def acquire(self, name):
+        """Nový prázdny adresár pre projekt name (môže obsahovať /).
+
+        Meno, ktoré sa práve používa (aj ako nadradený alebo vnorený
+        adresár), vyvolá ValueError; iný projekt by inak dostal (a vyprázdnil)
+        cudzí adresár.
+        """
+        with self._lock:
+            if any(self._in_use(os.path.join(base, name)) for base in (self.root, self.spill_root) if base):
+                raise ValueError(f"workspace {name} is already in use")
+            base = None
+            if self.root is not None:
+                deadline = time.monotonic() + self.wait_sec
+                while not self._tmpfs_has_room() and self._trash_bytes and time.monotonic() < deadline:
+                    self._lock.wait(max(0.0, deadline - time.monotonic()))
+                if self._tmpfs_has_room():
+                    base = self.root
+            if base is None:
+                base = self.spill_root
+            self.stats["tmpfs" if base == self.root else "spilled"] += 1
+            path = os.path.join(base, name)
+            self._live[path] = base
+        if os.path.lexists(path):
+            # zvyšok z predchádzajúceho behu (keep), živý adresár to už byť nemôže
+            self._discard(base, path, 0)
+        os.makedirs(path)
+        return path
+
+    def release(self, path):
+        with self._lock:
+            base = self._live.pop(path, None)
+        if base is None or self.keep or not os.path.lexists(path):
+            return
+        size = dir_size(path)
+        with self._lock:
+            self._released += 1
+            self._released_bytes += size
+        self._discard(base, path, size)
+
+    def _discard(self, base, path, size):
+        trash_path = os.path.join(base, ".trash", f"{os.getpid()}-{next(self._seq)}")
+        try:
+            os.rename(path, trash_path)
+        except OSError:
+            # iný FS alebo už neexistuje, maže sa priamo
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        if base == self.root:
+            with self._lock:
+                self._trash_bytes += size
+        self._queue.put((trash_path, size if base == self.root else 0))
+
+    def _reap(self):
+        while True:
+            trash_path, size = self._queue.get()
+            if trash_path is None:
+                return
+            start = time.perf_counter()
+            shutil.rmtree(trash_path, ignore_errors=True)
+            with self._lock:
+                self._trash_bytes -= size
+                self.stats["reaped"] += 1
+                self.stats["reap_sec"] += time.perf_counter() - start
+                self._lock.notify_all()
+
+    def close(self):
+        """Počká, kým reaper zmaže všetok odpad, a uvoľní adresáre poolu."""
+        self._queue.put((None, 0))
+        self._reaper.join()
+        for pool_dir in self._dirs:
+            pool_dir.close()
+        self.stats["reap_sec"] = round(self.stats["reap_sec"], 3)
+        return self.stats